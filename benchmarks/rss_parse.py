@@ -0,0 +1,147 @@
+"""Benchmark the streaming RSS parser against the old BeautifulSoup DOM parse.
+
+Usage:
+    python benchmarks/rss_parse.py                      # the committed 20k-item fixture
+    python benchmarks/rss_parse.py --items 100000       # bigger synthetic feed
+    python benchmarks/rss_parse.py --record feed.xml    # save the live EU feed
+    python benchmarks/rss_parse.py --feed feed.xml      # benchmark a recorded feed
+    python benchmarks/rss_parse.py --write-fixture      # regenerate the fixture
+
+benchmarks/fixtures/eu_funding_rss.xml.gz is synthetic: 20,000 items in
+the EU Funding & Tenders feed's layout, written by this script. It stands in
+for a recording of the live feed so runs are comparable across machines;
+replace it with `--record` output when one is available.
+
+The BeautifulSoup baseline only runs if beautifulsoup4 is installed.
+"""
+import argparse
+import gzip
+import shutil
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from grant_researcher.sources import eu_funding, rss
+
+CHUNK_SIZE = 64 * 1024
+FIXTURE = Path(__file__).parent / "fixtures" / "eu_funding_rss.xml.gz"
+FIXTURE_ITEMS = 20_000
+
+_ITEM = """<item>
+<title>HORIZON-CL5-2027-D6-{n:05d}: {topic}</title>
+<link>https://ec.europa.eu/info/funding-tenders/opportunities/portal/screen/opportunities/topic-details/x;callCode=HORIZON-CL5-2027-D6-{n:05d}</link>
+<description>&lt;p&gt;Call for proposals: {topic}. Expected outcome: projects are expected
+to contribute to measurable results across the European network.&lt;/p&gt;
+&lt;b&gt;Deadline&lt;/b&gt;: Thu, 16 Sep 2027 17:00:00 (Brussels local time)</description>
+<pubDate>Mon, 01 Mar 2027 10:00:00 GMT</pubDate>
+<guid>https://ec.europa.eu/info/funding-tenders/opportunities/{n}</guid>
+</item>
+"""
+
+_TOPICS = [
+    "Machine learning for air traffic management",
+    "Urban mobility and logistics",
+    "Renewable energy storage",
+    "Cultural heritage digitisation",
+]
+
+
+def _write_synthetic_feed(path: Path, items: int) -> None:
+    with open(path, "w") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0"><channel>\n')
+        f.write("<title>EU Funding &amp; Tenders</title>\n")
+        for n in range(items):
+            f.write(_ITEM.format(n=n, topic=_TOPICS[n % len(_TOPICS)]))
+        f.write("</channel></rss>\n")
+
+
+def _chunks(path: Path):
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            yield chunk
+
+
+def _bench_streaming(path: Path) -> int:
+    kept = 0
+    for call in eu_funding._iter_calls(_chunks(path)):
+        if eu_funding._is_relevant(call["title"], call["description"]):
+            kept += 1
+    return kept
+
+
+def _bench_soup(path: Path) -> int:
+    import warnings
+
+    from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
+
+    warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
+    soup = BeautifulSoup(path.read_text(), "html.parser")
+    kept = 0
+    for item in soup.find_all("item"):
+        title = item.find("title").text.strip()
+        description = item.find("description").text.strip()
+        if eu_funding._is_relevant(title, description):
+            kept += 1
+    return kept
+
+
+def _measure(label: str, fn, path: Path) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    kept = fn(path)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<14} {elapsed:>8.2f}s  peak {peak / 1e6:>8.1f} MB  {kept} relevant item(s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--feed", type=Path, help="RSS feed to parse (.xml or .xml.gz)")
+    parser.add_argument("--items", type=int, help="parse a synthetic feed of this size")
+    parser.add_argument("--record", type=Path, help="save the live EU feed here and exit")
+    parser.add_argument("--write-fixture", action="store_true", help="regenerate the fixture")
+    args = parser.parse_args()
+
+    if args.write_fixture:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "feed.xml"
+            _write_synthetic_feed(path, FIXTURE_ITEMS)
+            with open(path, "rb") as src, gzip.GzipFile(FIXTURE, "wb", mtime=0) as dst:
+                shutil.copyfileobj(src, dst)
+        print(f"Wrote {FIXTURE_ITEMS} item(s) to {FIXTURE}")
+        return
+
+    if args.record:
+        import httpx
+
+        with httpx.stream("GET", eu_funding.RSS_URL, follow_redirects=True, timeout=60) as resp:
+            resp.raise_for_status()
+            with open(args.record, "wb") as f:
+                for chunk in resp.iter_bytes():
+                    f.write(chunk)
+        print(f"Recorded {args.record.stat().st_size / 1e6:.1f} MB to {args.record}")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "feed.xml"
+        if args.items:
+            _write_synthetic_feed(path, args.items)
+        else:
+            feed = args.feed or FIXTURE
+            opener = gzip.open if feed.suffix == ".gz" else open
+            with opener(feed, "rb") as src, open(path, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+        item_count = sum(1 for _ in rss.iter_items(_chunks(path)))
+        print(f"Feed: {path.stat().st_size / 1e6:.1f} MB, {item_count} item(s)")
+
+        _measure("streaming", _bench_streaming, path)
+        try:
+            _measure("beautifulsoup", _bench_soup, path)
+        except ImportError:
+            print("beautifulsoup  skipped (beautifulsoup4 not installed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ import click
 
 from grant_evaluator.config import EvaluatorConfig
 from grant_evaluator.db import init_evaluation_db
+from grant_researcher import telemetry
 
 
 @click.group()
@@ -13,6 +14,7 @@ def cli(ctx):
     ctx.ensure_object(dict)
     config = EvaluatorConfig.load()
     conn = init_evaluation_db(config.db_path)
+    telemetry.configure(config.db_path)
     ctx.obj["config"] = config
     ctx.obj["conn"] = conn
 
@@ -93,16 +95,19 @@ def _load_guidelines(config, guidelines_names: tuple[str, ...]) -> str | None:
 @click.option("--proposal", required=True, help="Proposal filename or folder name (in proposals/)")
 @click.option("--criteria", default=None, help="RFP/criteria filename (in criteria/)")
 @click.option("--guidelines", multiple=True, help="Rules/guidelines file(s) (in criteria/), repeatable")
+@click.option("--no-cache", is_flag=True, help="Call Claude even for prompts answered before.")
 @click.pass_context
-def evaluate(ctx, proposal: str, criteria: str | None, guidelines: tuple[str, ...]):
+def evaluate(ctx, proposal: str, criteria: str | None, guidelines: tuple[str, ...], no_cache: bool):
     """Evaluate a proposal using a panel of AI reviewers."""
     from grant_evaluator.aggregator import aggregate_reviews
     from grant_evaluator.criteria import extract_rubric
     from grant_evaluator.db import create_run, update_run_aggregate, update_run_compliance
     from grant_evaluator.evaluators import run_compliance_check, run_panel
+    from grant_researcher import llm_cache
 
     config = ctx.obj["config"]
     conn = ctx.obj["conn"]
+    llm_cache.configure(None if no_cache else config.llm_cache_path)
 
     # Resolve proposal
     prop = _resolve_proposal(conn, proposal)
@@ -151,7 +156,7 @@ def evaluate(ctx, proposal: str, criteria: str | None, guidelines: tuple[str, ..
     if guidelines_text:
         click.echo("Phase 1: Guidelines compliance check...")
         compliance_results = run_compliance_check(
-            prop["text"], guidelines_text, config, on_progress=click.echo
+            prop["text"], guidelines_text, config, on_progress=click.echo, run_id=run_id
         )
         update_run_compliance(conn, run_id, compliance_results)
         passed = sum(1 for c in compliance_results if c["status"] == "pass")
@@ -185,6 +190,10 @@ def evaluate(ctx, proposal: str, criteria: str | None, guidelines: tuple[str, ..
     write_markdown_report(conn, report_path, prop["filename"], prop["id"])
     click.echo(f"Report saved to {report_path}")
 
+    stats = llm_cache.stats()
+    if stats.hits:
+        click.echo(f"Reused {stats.hits} cached response(s); {stats.misses} call(s) made.")
+
     click.echo(f"\nRun #{run_id} complete. Use 'report' to see detailed results.")
 
 
@@ -209,8 +218,11 @@ def report(ctx, proposal: str | None):
 @click.option("--proposal", required=True, help="Proposal filename or folder name (in proposals/)")
 @click.option("--criteria", default=None, help="RFP/criteria filename (in criteria/)")
 @click.option("--guidelines", multiple=True, help="Rules/guidelines file(s) (in criteria/), repeatable")
+@click.option("--no-cache", is_flag=True, help="Call Claude even for prompts answered before.")
 @click.pass_context
-def run(ctx, proposal: str, criteria: str | None, guidelines: tuple[str, ...]):
+def run(ctx, proposal: str, criteria: str | None, guidelines: tuple[str, ...], no_cache: bool):
     """Run the full pipeline: evaluate + report."""
-    ctx.invoke(evaluate, proposal=proposal, criteria=criteria, guidelines=guidelines)
+    ctx.invoke(
+        evaluate, proposal=proposal, criteria=criteria, guidelines=guidelines, no_cache=no_cache
+    )
     ctx.invoke(report, proposal=proposal)
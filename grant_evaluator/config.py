@@ -54,6 +54,10 @@ class EvaluatorConfig:
     def db_path(self) -> Path:
         return self.project_dir / "grants.db"
 
+    @property
+    def llm_cache_path(self) -> Path:
+        return self.project_dir / ".llm_cache.db"
+
     @property
     def criteria_path(self) -> Path:
         return self.project_dir / self.criteria_dir
@@ -1,10 +1,11 @@
 import json
 from pathlib import Path
 
-import anthropic
 import pymupdf
 
 from grant_evaluator.config import CriterionConfig
+from grant_researcher import llm
+from grant_researcher.telemetry import CallInfo
 
 
 def extract_text(path: Path) -> str:
@@ -49,10 +50,13 @@ Respond in this JSON format (and nothing else):
   ]
 }}"""
 
-    client = anthropic.Anthropic(api_key=api_key)
-    message = client.messages.create(
+    message = llm.create(
+        llm.get_client(api_key),
+        cache=True,
+        info=CallInfo("evaluator.rubric"),
         model=model,
         max_tokens=4096,
+        temperature=0,  # deterministic, so the cached rubric is the one it would give
         messages=[{"role": "user", "content": prompt}],
     )
 
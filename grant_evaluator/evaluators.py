@@ -1,10 +1,10 @@
 import json
 import sqlite3
 
-import anthropic
-
 from grant_evaluator.config import CriterionConfig, EvaluatorConfig
 from grant_evaluator.db import create_review, create_review_score
+from grant_researcher import llm
+from grant_researcher.telemetry import CallInfo
 
 
 def _build_prompt(
@@ -132,6 +132,7 @@ def run_compliance_check(
     guidelines_text: str,
     config: EvaluatorConfig,
     on_progress=None,
+    run_id: int | None = None,
 ) -> list[dict]:
     """Run a compliance check against guidelines. Returns list of check dicts."""
     if not config.anthropic_api_key:
@@ -140,13 +141,18 @@ def run_compliance_check(
     if on_progress:
         on_progress("  Running compliance check...")
 
-    client = anthropic.Anthropic(api_key=config.anthropic_api_key)
+    client = llm.get_client(config.anthropic_api_key)
     prompt = _build_compliance_prompt(proposal_text, guidelines_text)
 
-    message = client.messages.create(
+    # A factual check of a fixed document: answered deterministically, so
+    # re-running it reuses the cached answer
+    message = llm.create(
+        client,
+        cache=True,
+        info=CallInfo("evaluator.compliance", run_id and f"evaluation #{run_id}"),
         model=config.model,
         max_tokens=8192,
-        temperature=0.2,  # low temperature for factual compliance checking
+        temperature=0,
         messages=[{"role": "user", "content": prompt}],
     )
 
@@ -166,19 +172,25 @@ def run_panel(
     if not config.anthropic_api_key:
         raise RuntimeError("ANTHROPIC_API_KEY not set. Add it to your .env file.")
 
-    client = anthropic.Anthropic(api_key=config.anthropic_api_key)
+    client = llm.get_client(config.anthropic_api_key)
     prompt = _build_prompt(proposal_text, criteria, criteria_text)
 
     # Build weight lookup for computing weighted overall score
     weight_map = {c.name: c.weight for c in criteria}
 
+    # Reviewers sample independently; only a deterministic panel is cached
+    cache = config.temperature == 0
+
     all_reviews = []
 
     for reviewer_num in range(1, config.panel_size + 1):
         if on_progress:
             on_progress(f"  Reviewer {reviewer_num}/{config.panel_size}...")
 
-        message = client.messages.create(
+        message = llm.create(
+            client,
+            cache=cache,
+            info=CallInfo("evaluator.review", f"evaluation #{run_id}"),
             model=config.model,
             max_tokens=8192,
             temperature=config.temperature,
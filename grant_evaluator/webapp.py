@@ -228,7 +228,8 @@ def evaluate():
             if guidelines_text:
                 progress_cb("Phase 1: Guidelines compliance check...")
                 compliance_results = run_compliance_check(
-                    prop["text"], guidelines_text, config, on_progress=progress_cb
+                    prop["text"], guidelines_text, config, on_progress=progress_cb,
+                    run_id=run_id,
                 )
                 update_run_compliance(conn, run_id, compliance_results)
                 passed = sum(1 for c in compliance_results if c["status"] == "pass")
@@ -363,6 +364,11 @@ def get_run(run_id):
 
 
 def main():
+    from grant_researcher import llm_cache, telemetry
+
+    config = _get_config()
+    llm_cache.configure(config.llm_cache_path)
+    telemetry.configure(config.db_path)
     app.run(debug=True, host="127.0.0.1", port=5000, threaded=True)
 
 
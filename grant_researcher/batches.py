@@ -0,0 +1,220 @@
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from sqlite3 import Connection
+from typing import Callable
+
+import anthropic
+
+from grant_researcher import telemetry
+from grant_researcher.config import Config
+from grant_researcher.db import (
+    copy_duplicate_scores,
+    get_grants_by_ids,
+    get_match_batch_requests,
+    get_open_match_batches,
+    get_proposals,
+    record_match_batch_collected,
+    save_match_batch,
+)
+from grant_researcher.matcher import (
+    SCORING_MODEL,
+    TRIAGE_MODEL,
+    TRIAGE_REJECT_REASON,
+    _build_batch_filter_system,
+    _build_scoring_system,
+    _parse_batch_filter_response,
+    _parse_response,
+    make_client,
+    pack_triage_batches,
+    prepare_unscored,
+    profile_fingerprint,
+    scoring_params,
+    triage_params,
+)
+
+# The API allows 100,000 requests per batch; smaller batches finish sooner
+MAX_REQUESTS_PER_BATCH = 10_000
+# Seconds between status checks when collecting with wait=True
+POLL_INTERVAL = 60
+
+
+@dataclass
+class CollectResult:
+    collected: int = 0  # batches whose results were applied
+    pending: int = 0  # batches still open, including scoring batches just submitted
+    scored: int = 0  # grants that received a score
+    failed: int = 0  # grants whose request errored or expired; rescored next run
+    submitted: int = 0  # candidates sent on to a scoring batch
+
+
+def _create_batches(
+    client: anthropic.Anthropic,
+    stage: str,
+    requests: list[tuple[str, dict, list[int]]],
+    fingerprint: str,
+) -> list[tuple[str, str, dict[str, list[int]], str]]:
+    """Submit (custom_id, params, grant_ids) requests as batches.
+
+    Returns (batch_id, stage, grant ids per custom_id, fingerprint) for
+    each batch, ready to record with `save_match_batch`.
+    """
+    batches = []
+    for i in range(0, len(requests), MAX_REQUESTS_PER_BATCH):
+        chunk = requests[i : i + MAX_REQUESTS_PER_BATCH]
+        batch = client.messages.batches.create(
+            requests=[{"custom_id": custom_id, "params": params} for custom_id, params, _ in chunk]
+        )
+        batches.append(
+            (batch.id, stage, {custom_id: ids for custom_id, _, ids in chunk}, fingerprint)
+        )
+    return batches
+
+
+def submit_match_batches(
+    config: Config,
+    conn: Connection,
+    on_progress: Callable[[str], None] | None = None,
+    client: anthropic.Anthropic | None = None,
+) -> int:
+    """Submit triage of all unscored grants through the Message Batches API.
+
+    Results are applied later by `collect_match_batches`, which also submits
+    the scoring batch for the candidates. Returns the number of grants
+    submitted.
+    """
+    if client is None:
+        client = make_client(config)
+
+    proposal_texts = [p["text"] for p in get_proposals(conn)]
+    unscored, resolved = prepare_unscored(config, conn, proposal_texts, on_progress)
+    if resolved and on_progress:
+        on_progress(f"Scored {resolved} grant(s) locally.")
+    if not unscored:
+        return 0
+
+    system = _build_batch_filter_system(config, proposal_texts)
+    requests = [
+        (f"triage-{batch[0]['id']}", triage_params(batch, system, config), [g["id"] for g in batch])
+        for batch in pack_triage_batches(unscored, config)
+    ]
+    batch_ids = []
+    for batch in _create_batches(
+        client, "triage", requests, profile_fingerprint(config, proposal_texts)
+    ):
+        save_match_batch(conn, *batch)
+        batch_ids.append(batch[0])
+
+    if on_progress:
+        on_progress(
+            f"Submitted {len(unscored)} grant(s) for triage in {len(requests)} request(s): "
+            f"{', '.join(batch_ids)}. Run 'match --collect' once processing ends."
+        )
+    return len(unscored)
+
+
+def _collect_one(
+    config: Config,
+    conn: Connection,
+    client: anthropic.Anthropic,
+    row: dict,
+    result: CollectResult,
+    on_progress: Callable[[str], None] | None,
+) -> None:
+    batch = client.messages.batches.retrieve(row["id"])
+    if batch.processing_status != "ended":
+        if on_progress:
+            on_progress(f"Batch {row['id']} ({row['stage']}) is still {batch.processing_status}.")
+        return
+
+    requests = get_match_batch_requests(conn, row["id"])
+    grants = get_grants_by_ids(conn, [i for ids in requests.values() for i in ids])
+    scores = []
+    candidates = []
+    submitted_at = datetime.fromisoformat(row["submitted_at"])
+    model = TRIAGE_MODEL if row["stage"] == "triage" else SCORING_MODEL
+    for entry in client.messages.batches.results(row["id"]):
+        ids = requests.get(entry.custom_id)
+        if ids is None:
+            continue
+        grant_id = ids[0] if row["stage"] == "score" else None
+        info = telemetry.CallInfo(f"batch.{row['stage']}", f"batch {row['id']}", grant_id)
+        if entry.result.type != "succeeded":
+            result.failed += len(ids)
+            telemetry.record(
+                info, model, submitted_at, batch=True, error=f"batch result {entry.result.type}"
+            )
+            continue
+
+        message = entry.result.message
+        telemetry.record(info, message.model, submitted_at, usage=message.usage, batch=True)
+        text = message.content[0].text
+        if row["stage"] == "triage":
+            # Grants purged since submission stay as None placeholders so
+            # the numbers in the response still line up
+            batch_grants = [grants.get(i) for i in ids]
+            try:
+                picked = _parse_batch_filter_response(text, batch_grants, message.stop_reason)
+            except ValueError:
+                result.failed += len(ids)
+                continue
+            picked = [g for g in picked if g]
+            picked_ids = {g["id"] for g in picked}
+            scores.extend(
+                (g["id"], 0, TRIAGE_REJECT_REASON)
+                for g in batch_grants if g and g["id"] not in picked_ids
+            )
+            candidates.extend(picked)
+        elif ids[0] in grants:
+            score, reasoning = _parse_response(text)
+            scores.append((ids[0], score, reasoning))
+
+    # Scores carry the fingerprint of the profile the batch was built from;
+    # the scoring batch is built from the profile as it is now
+    submitted = []
+    if candidates:
+        proposal_texts = [p["text"] for p in get_proposals(conn)]
+        system = _build_scoring_system(config, proposal_texts)
+        submitted = _create_batches(client, "score", [
+            (f"score-{g['id']}", scoring_params(g, system), [g["id"]]) for g in candidates
+        ], profile_fingerprint(config, proposal_texts))
+    record_match_batch_collected(conn, row, scores, submitted)
+
+    result.collected += 1
+    result.scored += len(scores)
+    result.submitted += len(candidates)
+    if on_progress:
+        on_progress(
+            f"Batch {row['id']} ({row['stage']}): {len(scores)} grant(s) scored"
+            + (f", {len(candidates)} candidate(s) submitted for scoring" if candidates else "")
+            + "."
+        )
+
+
+def collect_match_batches(
+    config: Config,
+    conn: Connection,
+    on_progress: Callable[[str], None] | None = None,
+    client: anthropic.Anthropic | None = None,
+    wait: bool = False,
+) -> CollectResult:
+    """Apply the results of every finished Message Batch.
+
+    Triage results mark rejected grants and submit a scoring batch for the
+    candidates. Failed or expired requests leave their grants unscored for
+    the next run. With `wait`, keeps polling every POLL_INTERVAL seconds
+    until no batch is left open, including the scoring batches it submits.
+    """
+    if client is None:
+        client = make_client(config)
+
+    result = CollectResult()
+    while True:
+        for row in get_open_match_batches(conn):
+            _collect_one(config, conn, client, row, result, on_progress)
+        result.scored += copy_duplicate_scores(conn)
+
+        result.pending = len(get_open_match_batches(conn))
+        if not wait or not result.pending:
+            return result
+        time.sleep(POLL_INTERVAL)
@@ -1,7 +1,15 @@
 import click
 
+from grant_researcher import telemetry
 from grant_researcher.config import Config
-from grant_researcher.db import init_db, grant_count, purge_expired_grants
+from grant_researcher.db import (
+    GrantWriter,
+    get_source_watermark,
+    get_unparsed_deadlines,
+    grant_count,
+    init_db,
+    purge_expired_grants,
+)
 
 
 @click.group()
@@ -11,6 +19,7 @@ def cli(ctx):
     ctx.ensure_object(dict)
     config = Config.load()
     conn = init_db(config.db_path)
+    telemetry.configure(config.db_path)
     ctx.obj["config"] = config
     ctx.obj["conn"] = conn
 
@@ -25,29 +34,59 @@ def ingest(ctx):
     conn = ctx.obj["conn"]
 
     click.echo(f"Scanning {config.proposals_dir} for PDFs and proposal folders...")
-    ingested = ingest_proposals(config.proposals_dir, conn)
+    results = []
+
+    def on_result(result):
+        results.append(result)
+        if result.error:
+            click.echo(f"  Failed to extract {result.name}: {result.error}", err=True)
+
+    ingested = ingest_proposals(
+        config.proposals_dir,
+        conn,
+        max_workers=config.ingest.max_workers,
+        commit_every=config.ingest.commit_every,
+        on_result=on_result,
+    )
 
     if ingested:
         click.echo(f"Ingested {len(ingested)} proposal(s): {', '.join(ingested)}")
     else:
         click.echo("No new or updated proposals found.")
 
+    if results:
+        click.echo("Extraction timings:")
+        for result in sorted(results, key=lambda r: r.elapsed, reverse=True):
+            status = "failed" if result.error else f"{len(result.text):,} chars"
+            click.echo(f"  {result.name:<40} {result.elapsed:>6.2f}s  {status}")
+
 
 @cli.command()
+@click.option("--full", is_flag=True, help="Ignore watermarks and HTTP caches and resync everything.")
+@click.option(
+    "--sources",
+    metavar="NAMES",
+    help="Comma-separated sources to search (e.g. grants.gov,ted). Defaults to all.",
+)
 @click.pass_context
-def search(ctx):
+def search(ctx, full: bool, sources: str | None):
     """Fetch grants from Grants.gov, SBIR.gov, TRB RIP, EU Funding & Tenders, TED, Google, and SAM.gov."""
-    from grant_researcher.sources.grants_gov import search_grants as search_grants_gov
-    from grant_researcher.sources.sbir_gov import search_grants as search_sbir
-    from grant_researcher.sources.trb_rip import search_grants as search_trb
-    from grant_researcher.sources.eu_funding import search_grants as search_eu
-    from grant_researcher.sources.ted_eu import search_grants as search_ted
-    from grant_researcher.sources.google_search import search_grants as search_google
-    from grant_researcher.sources.sam_gov import search_grants as search_sam
+    from functools import partial
+
+    from grant_researcher.search import SourceTask, run_sources
+    from grant_researcher.sources import http, ratelimit, registry
 
     config = ctx.obj["config"]
     conn = ctx.obj["conn"]
 
+    try:
+        specs = registry.select_sources(sources.split(",") if sources else None)
+    except KeyError as e:
+        names = ", ".join(spec.name for spec in registry.SOURCES)
+        raise click.BadParameter(
+            f"unknown source {e.args[0]!r} (choose from {names})", param_hint="--sources"
+        )
+
     expired = purge_expired_grants(conn)
     if expired:
         click.echo(f"Purged {expired} expired grant(s).")
@@ -55,75 +94,262 @@ def search(ctx):
     keywords = config.search.keywords
     before = grant_count(conn)
 
-    click.echo(f"Searching Grants.gov with {len(keywords)} keyword(s)...")
-    try:
-        search_grants_gov(keywords, conn)
-    except Exception as e:
-        click.echo(f"Grants.gov failed: {e}", err=True)
+    tasks = []
+    for spec in specs:
+        if not all(getattr(config, attr) for attr in spec.credentials.values()):
+            env_vars = " or ".join(attr.upper() for attr in spec.credentials.values())
+            click.echo(f"Skipping {spec.label} ({env_vars} not set).")
+            continue
 
-    click.echo(f"Searching SBIR.gov with {len(keywords)} keyword(s)...")
-    try:
-        search_sbir(keywords, conn)
-    except Exception as e:
-        click.echo(f"SBIR.gov failed: {e}", err=True)
+        module = spec.load()
+        ratelimit.configure(
+            getattr(module, spec.url_attr),
+            config.search.rate_limits.get(spec.name, spec.rate_limit),
+        )
 
-    click.echo(f"Searching TRB RIP with {len(keywords)} keyword(s)...")
-    try:
-        search_trb(keywords, conn)
-    except Exception as e:
-        click.echo(f"TRB RIP failed: {e}", err=True)
+        kwargs = {kw: getattr(config, attr) for kw, attr in spec.credentials.items()}
+        if spec.supports_pagination:
+            kwargs["max_pages"] = config.search.max_pages
+        if spec.supports_concurrency and spec.name in config.search.concurrency:
+            kwargs["concurrency"] = config.search.concurrency[spec.name]
 
-    click.echo("Searching EU Funding & Tenders Portal...")
-    try:
-        search_eu(keywords, conn)
-    except Exception as e:
-        click.echo(f"EU Funding & Tenders failed: {e}", err=True)
+        message = f"Searching {spec.label}"
+        if spec.uses_keywords:
+            message += f" with {len(keywords)} keyword(s)"
+        if spec.supports_since:
+            kwargs["since"] = None if full else get_source_watermark(conn, spec.name)
+            if kwargs["since"]:
+                message += f" since {kwargs['since']:%Y-%m-%d}"
+        click.echo(message + "...")
+
+        tasks.append(SourceTask(
+            spec.label,
+            partial(module.search_grants, keywords, **kwargs),
+            state_key=spec.name if spec.supports_since else None,
+        ))
 
-    click.echo("Searching TED (Tenders Electronic Daily)...")
+    def on_result(result):
+        if result.error:
+            click.echo(f"{result.label} failed: {result.error}", err=True)
+
+    writer = GrantWriter(conn, flush_size=config.search.flush_size)
+    http.configure(None if full else config.http_cache_dir)
     try:
-        search_ted(keywords, conn)
-    except Exception as e:
-        click.echo(f"TED failed: {e}", err=True)
+        results = run_sources(tasks, writer, config.search.max_workers, on_result=on_result)
+        # Only now are the grants behind this run's responses written
+        http.save_validators()
+    finally:
+        http.close()
 
-    if config.google_api_key and config.google_cse_id:
-        click.echo(f"Searching Google with {len(keywords)} keyword(s)...")
-        try:
-            search_google(keywords, conn, config.google_api_key, config.google_cse_id)
-        except Exception as e:
-            click.echo(f"Google Search failed: {e}", err=True)
-    else:
-        click.echo("Skipping Google Search (GOOGLE_API_KEY or GOOGLE_CSE_ID not set).")
+    click.echo("Source timings:")
+    for result in sorted(results, key=lambda r: r.elapsed, reverse=True):
+        status = "failed" if result.error else f"{result.count} grant(s)"
+        click.echo(f"  {result.label:<22} {result.elapsed:>6.1f}s  {status}")
 
-    if config.sam_api_key:
-        click.echo(f"Searching SAM.gov with {len(keywords)} keyword(s)...")
-        try:
-            search_sam(keywords, conn, config.sam_api_key)
-        except Exception as e:
-            click.echo(f"SAM.gov failed: {e}", err=True)
-    else:
-        click.echo("Skipping SAM.gov (SAM_API_KEY not set).")
+    if writer.truncated:
+        click.echo(
+            f"Results were cut off at the page cap for {', '.join(sorted(writer.truncated))}; "
+            "their watermarks were left in place so the next search asks again."
+        )
+
+    throttled_hosts = [(h, s) for h, s in ratelimit.stats().items() if s.waits or s.throttled]
+    if throttled_hosts:
+        click.echo("Rate limiting:")
+        for host, stats in throttled_hosts:
+            click.echo(
+                f"  {host:<28} {stats.wait_seconds:>6.1f}s waited over "
+                f"{stats.requests} request(s), {stats.throttled} server push-back(s)"
+            )
+
+    click.echo(
+        f"Processed {writer.written} grant(s) from {writer.received} result(s) "
+        f"({writer.duplicates} duplicate(s) collapsed): {writer.stats.new} new, "
+        f"{writer.stats.changed} changed (queued for re-scoring), "
+        f"{writer.stats.unchanged} unchanged."
+    )
+
+    unparsed = get_unparsed_deadlines(conn)
+    if unparsed:
+        click.echo(
+            f"{len(unparsed)} grant(s) have a deadline in an unrecognized format "
+            "and will not be purged automatically:"
+        )
+        for g in unparsed[:5]:
+            click.echo(f"  {g['source']:<14} {g['deadline']!r:<24} {(g['title'] or '')[:50]}")
+        if len(unparsed) > 5:
+            click.echo(f"  ... and {len(unparsed) - 5} more")
 
     after = grant_count(conn)
     click.echo(f"Done. {after - before} new grant(s) added ({after} total in DB).")
 
 
 @cli.command()
+@click.option(
+    "--evaluate-prefilter",
+    is_flag=True,
+    help="Compare the local pre-filter with past Haiku triage decisions instead of scoring.",
+)
+@click.option(
+    "--batch", "submit_batch", is_flag=True,
+    help="Submit triage through the Message Batches API (cheaper, results within 24h).",
+)
+@click.option(
+    "--collect", is_flag=True,
+    help="Apply finished Message Batch results and submit scoring for the candidates.",
+)
+@click.option("--wait", is_flag=True, help="With --collect, poll until every batch has finished.")
+@click.option(
+    "--rescore-stale", is_flag=True,
+    help="Re-score open grants whose score predates a profile or proposal change.",
+)
+@click.option(
+    "--budget", type=int, default=None,
+    help="With --rescore-stale, the most grants to re-score (default: matcher.rescore_budget).",
+)
+@click.option("--no-cache", is_flag=True, help="Call Claude even for prompts answered before.")
+@click.option(
+    "--status", "show_status", is_flag=True,
+    help="Show match job progress (also while another match is running) and exit.",
+)
 @click.pass_context
-def match(ctx):
+def match(
+    ctx,
+    show_status: bool,
+    evaluate_prefilter: bool,
+    submit_batch: bool,
+    collect: bool,
+    wait: bool,
+    rescore_stale: bool,
+    budget: int | None,
+    no_cache: bool,
+):
     """Score unmatched grants using Claude (requires ANTHROPIC_API_KEY)."""
+    from grant_researcher import llm_cache
     from grant_researcher.matcher import match_grants
 
     config = ctx.obj["config"]
     conn = ctx.obj["conn"]
 
+    if show_status:
+        _echo_match_status(conn)
+        return
+
+    if submit_batch or collect:
+        from grant_researcher.batches import collect_match_batches, submit_match_batches
+
+        try:
+            if collect:
+                result = collect_match_batches(config, conn, on_progress=click.echo, wait=wait)
+                click.echo(
+                    f"Collected {result.collected} batch(es): {result.scored} grant(s) scored, "
+                    f"{result.failed} failed (rescored next run), "
+                    f"{result.pending} batch(es) still open."
+                )
+            if submit_batch:
+                if not submit_match_batches(config, conn, on_progress=click.echo):
+                    click.echo("No unscored grants to submit.")
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+        return
+
+    if evaluate_prefilter:
+        from grant_researcher.db import get_proposals
+        from grant_researcher.prefilter import evaluate
+
+        proposal_texts = [p["text"] for p in get_proposals(conn)]
+        haiku_rejected, haiku_passed, results = evaluate(conn, config, proposal_texts)
+        if not results:
+            click.echo("No Haiku triage decisions to compare against yet. Run 'match' first.")
+            return
+        click.echo(
+            f"Past triage: {haiku_rejected} rejected, {haiku_passed} passed to Pass 2. "
+            f"Current threshold: {config.matcher.prefilter_threshold:g}"
+        )
+        click.echo(f"{'Threshold':>10}  {'Rejected':>8}  {'Agree':>6}  {'Lost':>5}")
+        for r in results:
+            click.echo(f"{r.threshold:>10.4f}  {r.rejected:>8}  {r.agreed:>6}  {r.lost:>5}")
+        click.echo("Lost = grants Haiku passed that the pre-filter would have rejected.")
+        return
+
+    if budget is None:
+        budget = config.matcher.rescore_budget
+
+    llm_cache.configure(None if no_cache else config.llm_cache_path)
     try:
-        scored = match_grants(config, conn, on_progress=click.echo)
+        scored = match_grants(
+            config, conn, on_progress=click.echo, rescore_stale=rescore_stale, budget=budget
+        )
     except RuntimeError as e:
         raise click.ClickException(str(e))
+    finally:
+        _echo_cache_stats()
+        _echo_gateway_stats()
 
+    if rescore_stale:
+        if not scored:
+            click.echo("No stale scores to refresh.")
+        return
     if not scored:
         click.echo("No unscored grants to process.")
 
+    from grant_researcher.db import get_proposals, get_stale_grants
+    from grant_researcher.matcher import profile_fingerprint
+
+    proposal_texts = [p["text"] for p in get_proposals(conn)]
+    stale = get_stale_grants(conn, profile_fingerprint(config, proposal_texts))
+    if stale:
+        click.echo(
+            f"{len(stale)} open grant(s) were scored against an older company profile "
+            f"or proposal set. Run 'match --rescore-stale' to refresh them."
+        )
+
+
+def _echo_match_status(conn) -> None:
+    from grant_researcher.db import get_failed_match_jobs, get_match_job_counts
+
+    counts = get_match_job_counts(conn)
+    if not counts:
+        click.echo("No match jobs recorded yet.")
+        return
+    click.echo(
+        f"Match jobs: {counts.get('pending', 0)} awaiting triage, "
+        f"{counts.get('candidate', 0)} candidate(s) awaiting scoring, "
+        f"{counts.get('rejected', 0)} rejected in triage, {counts.get('scored', 0)} scored."
+    )
+    failed = get_failed_match_jobs(conn)
+    if failed:
+        click.echo("Failed at least once (retried on the next run):")
+        for job in failed:
+            click.echo(
+                f"  #{job['grant_id']:<6} {job['stage']:<9} {job['attempts']} attempt(s)  "
+                f"{(job['title'] or '')[:50]}: {(job['last_error'] or '')[:80]}"
+            )
+
+
+def _echo_gateway_stats() -> None:
+    from grant_researcher import llm
+
+    throttled = [(m, s) for m, s in llm.stats().items() if s.throttled or s.retries]
+    if throttled:
+        click.echo("Claude API push-back:")
+        for model, stats in throttled:
+            click.echo(
+                f"  {model:<28} {stats.throttled} 429/529 response(s), {stats.retries} retr(ies), "
+                f"concurrency dropped as low as {int(stats.min_limit)}"
+            )
+
+
+def _echo_cache_stats() -> None:
+    from grant_researcher import llm_cache
+
+    stats = llm_cache.stats()
+    if stats.hits or stats.misses:
+        entries, size = llm_cache.summary()
+        click.echo(
+            f"LLM response cache: {stats.hits} hit(s), {stats.misses} miss(es), "
+            f"{stats.evictions} evicted; {entries} entries ({size / 1e6:.1f} MB)."
+        )
+
 
 @cli.command()
 @click.pass_context
@@ -136,10 +362,94 @@ def report(ctx):
 
 
 @cli.command()
+@click.argument("query", nargs=-1, required=True)
+@click.option("--source", "sources", multiple=True, help="Only grants from this source (repeatable).")
+@click.option("--deadline-after", type=click.DateTime(["%Y-%m-%d"]), help="Deadline on or after this date.")
+@click.option("--deadline-before", type=click.DateTime(["%Y-%m-%d"]), help="Deadline before this date.")
+@click.option("--min-score", type=int, help="Only grants scored at least this high.")
+@click.option("--include-expired", is_flag=True, help="Also show grants whose deadline has passed.")
+@click.option("--limit", default=20, show_default=True, help="Maximum number of results.")
+@click.pass_context
+def find(ctx, query, sources, deadline_after, deadline_before, min_score, include_expired, limit):
+    """Search stored grants locally by title, agency and description."""
+    from datetime import timezone
+
+    from grant_researcher.db import find_grants
+
+    conn = ctx.obj["conn"]
+    grants = find_grants(
+        conn,
+        " ".join(query),
+        sources=list(sources),
+        deadline_after=deadline_after and deadline_after.replace(tzinfo=timezone.utc),
+        deadline_before=deadline_before and deadline_before.replace(tzinfo=timezone.utc),
+        min_score=min_score,
+        include_expired=include_expired,
+        limit=limit,
+    )
+
+    if not grants:
+        click.echo("No matching grants.")
+        return
+
+    click.echo(f"{'Score':>5}  {'Source':<14} {'Deadline':<12} {'Title'}")
+    click.echo(f"{'─'*5}  {'─'*14} {'─'*12} {'─'*40}")
+    for g in grants:
+        score = "-" if g["score"] is None else g["score"]
+        deadline = (g["deadline"] or "N/A")[:12]
+        click.echo(f"{score:>5}  {g['source']:<14} {deadline:<12} {(g['title'] or '')[:80]}")
+        if g["snippet"]:
+            click.echo(f"{'':>21}{g['snippet'][:120]}")
+
+
+@cli.command()
+@click.option(
+    "--by", "groupings", multiple=True, type=click.Choice(["run", "day", "model", "site"]),
+    help="Roll up by run, day, model or call site (repeatable). Defaults to run, day and model.",
+)
+@click.option("--days", type=int, help="Only calls from the last N days.")
+@click.option("--limit", default=10, show_default=True, help="Rows shown per rollup.")
+@click.pass_context
+def stats(ctx, groupings: tuple[str, ...], days: int | None, limit: int):
+    """Show Claude token usage, latency and estimated cost per run, day and model."""
+    conn = ctx.obj["conn"]
+
+    for by in groupings or ("run", "day", "model"):
+        rows = telemetry.rollup(conn, by, days)
+        if not rows:
+            click.echo("No model calls recorded yet.")
+            return
+
+        click.echo(f"\nBy {by}:")
+        click.echo(
+            f"{by.capitalize():<32} {'Calls':>6} {'Input':>10} {'Output':>9} {'Cache rd':>10} "
+            f"{'Cache wr':>9} {'Cost $':>8} {'p50 ms':>7} {'p95 ms':>7} {'Errors':>6}"
+        )
+        for r in rows[:limit]:
+            cost = f"{r.cost:.2f}" + ("+" if r.unpriced else "")
+            p50 = "-" if r.p50_ms is None else r.p50_ms
+            p95 = "-" if r.p95_ms is None else r.p95_ms
+            click.echo(
+                f"{r.key[:32]:<32} {r.calls:>6} {r.input_tokens:>10} {r.output_tokens:>9} "
+                f"{r.cache_read_tokens:>10} {r.cache_write_tokens:>9} {cost:>8} "
+                f"{p50:>7} {p95:>7} {r.errors:>6}"
+            )
+        if len(rows) > limit:
+            click.echo(f"... and {len(rows) - limit} more")
+
+    click.echo(
+        "\nCosts are estimates from list prices (Message Batches at half price); "
+        "'+' marks calls to models without a known price."
+    )
+
+
+@cli.command()
+@click.option("--full", is_flag=True, help="Resync every source instead of searching incrementally.")
+@click.option("--no-cache", is_flag=True, help="Call Claude even for prompts answered before.")
 @click.pass_context
-def run(ctx):
+def run(ctx, full: bool, no_cache: bool):
     """Run the full pipeline: ingest → search → match → report."""
     ctx.invoke(ingest)
-    ctx.invoke(search)
-    ctx.invoke(match)
+    ctx.invoke(search, full=full)
+    ctx.invoke(match, no_cache=no_cache)
     ctx.invoke(report)
@@ -17,6 +17,39 @@ class CompanyConfig:
 @dataclass
 class SearchConfig:
     keywords: list[str] = field(default_factory=list)
+    max_workers: int = 7
+    # Per-source cap on concurrent keyword queries, keyed by source name
+    concurrency: dict[str, int] = field(default_factory=dict)
+    # Result pages fetched per keyword from paginated APIs
+    max_pages: int = 10
+    # Per-source request rate (requests/second), keyed by source name
+    rate_limits: dict[str, float] = field(default_factory=dict)
+    # Grants buffered in memory before they are written in one transaction
+    flush_size: int = 500
+
+
+@dataclass
+class MatcherConfig:
+    # Grants whose local relevance score falls below this are rejected without
+    # an LLM call; 0 disables the pre-filter. Tune with `match --evaluate-prefilter`.
+    prefilter_threshold: float = 0.0
+    # LLM requests in flight at once during triage and scoring
+    max_in_flight: int = 8
+    # Target size (estimated tokens) of the grant list in one triage request;
+    # batches are packed up to this rather than by a fixed count
+    triage_batch_tokens: int = 3000
+    # Most of a grant description shown to triage, in estimated tokens
+    triage_snippet_tokens: int = 150
+    # Grants re-scored per `match --rescore-stale` run; 0 means no cap
+    rescore_budget: int = 200
+
+
+@dataclass
+class IngestConfig:
+    # Processes extracting proposal PDFs in parallel; 0 uses one per CPU
+    max_workers: int = 0
+    # Extracted proposals written per transaction
+    commit_every: int = 10
 
 
 @dataclass
@@ -28,6 +61,8 @@ class Config:
     google_api_key: str
     google_cse_id: str
     project_dir: Path
+    matcher: MatcherConfig = field(default_factory=MatcherConfig)
+    ingest: IngestConfig = field(default_factory=IngestConfig)
 
     @classmethod
     def load(cls, config_path: Path | None = None) -> "Config":
@@ -42,6 +77,8 @@ class Config:
 
         company = CompanyConfig(**raw.get("company", {}))
         search = SearchConfig(**raw.get("search", {}))
+        matcher = MatcherConfig(**raw.get("matcher", {}))
+        ingest = IngestConfig(**raw.get("ingest", {}))
         anthropic_api_key = os.environ.get("ANTHROPIC_API_KEY", "")
         sam_api_key = os.environ.get("SAM_API_KEY", "")
         google_api_key = os.environ.get("GOOGLE_API_KEY", "")
@@ -55,6 +92,8 @@ class Config:
             google_api_key=google_api_key,
             google_cse_id=google_cse_id,
             project_dir=project_dir,
+            matcher=matcher,
+            ingest=ingest,
         )
 
     @property
@@ -64,3 +103,11 @@ class Config:
     @property
     def proposals_dir(self) -> Path:
         return self.project_dir / "proposals"
+
+    @property
+    def http_cache_dir(self) -> Path:
+        return self.project_dir / ".http_cache"
+
+    @property
+    def llm_cache_path(self) -> Path:
+        return self.project_dir / ".llm_cache.db"
@@ -1,5 +1,9 @@
+import hashlib
 import json
+import re
 import sqlite3
+import threading
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
@@ -18,12 +22,16 @@ def init_db(db_path: Path) -> sqlite3.Connection:
             agency TEXT,
             description TEXT,
             deadline TEXT,
+            deadline_at TEXT,
             url TEXT,
             amount TEXT,
             raw_json TEXT,
             score INTEGER,
             score_reasoning TEXT,
             matched_at TEXT,
+            profile_fingerprint TEXT,
+            content_hash TEXT,
+            duplicate_of INTEGER,
             created_at TEXT NOT NULL DEFAULT (datetime('now')),
             UNIQUE(source, external_id)
         );
@@ -35,30 +43,298 @@ def init_db(db_path: Path) -> sqlite3.Connection:
             file_hash TEXT,
             ingested_at TEXT NOT NULL DEFAULT (datetime('now'))
         );
+
+        CREATE TABLE IF NOT EXISTS source_state (
+            source TEXT PRIMARY KEY,
+            watermark TEXT,
+            last_count INTEGER,
+            updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+        );
+
+        CREATE TABLE IF NOT EXISTS match_batches (
+            id TEXT PRIMARY KEY,
+            stage TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'submitted',
+            request_count INTEGER NOT NULL,
+            submitted_at TEXT NOT NULL,
+            collected_at TEXT,
+            fingerprint TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS match_batch_requests (
+            batch_id TEXT NOT NULL,
+            custom_id TEXT NOT NULL,
+            grant_ids TEXT NOT NULL,
+            PRIMARY KEY (batch_id, custom_id)
+        );
+
+        CREATE TABLE IF NOT EXISTS match_jobs (
+            grant_id INTEGER PRIMARY KEY,
+            stage TEXT NOT NULL,
+            fingerprint TEXT,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            updated_at TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS grant_signatures (
+            grant_id INTEGER PRIMARY KEY,
+            content_hash TEXT,
+            signature BLOB
+        );
     """)
     conn.commit()
+
+    # Migration: add content_hash column and fingerprint existing rows
+    cols = [row[1] for row in conn.execute("PRAGMA table_info(grants)").fetchall()]
+    if "content_hash" not in cols:
+        conn.execute("ALTER TABLE grants ADD COLUMN content_hash TEXT")
+        rows = conn.execute("SELECT * FROM grants").fetchall()
+        conn.executemany(
+            "UPDATE grants SET content_hash = ? WHERE id = ?",
+            [(content_hash(dict(r)), r["id"]) for r in rows],
+        )
+        conn.commit()
+
+    # Migration: add duplicate_of column
+    if "duplicate_of" not in cols:
+        conn.execute("ALTER TABLE grants ADD COLUMN duplicate_of INTEGER")
+        conn.commit()
+
+    # Migration: add deadline_at column and normalize existing deadlines
+    if "deadline_at" not in cols:
+        conn.execute("ALTER TABLE grants ADD COLUMN deadline_at TEXT")
+        rows = conn.execute(
+            "SELECT id, deadline FROM grants WHERE deadline IS NOT NULL AND deadline != ''"
+        ).fetchall()
+        conn.executemany(
+            "UPDATE grants SET deadline_at = ? WHERE id = ?",
+            [(deadline_at(r["deadline"]), r["id"]) for r in rows],
+        )
+        conn.commit()
+
+    # Migration: add profile_fingerprint column; existing scores count as stale
+    if "profile_fingerprint" not in cols:
+        conn.execute("ALTER TABLE grants ADD COLUMN profile_fingerprint TEXT")
+        conn.commit()
+
+    # Migration: remember the profile each Message Batch was built from; batches
+    # submitted before this count as stale once collected
+    batch_cols = [row[1] for row in conn.execute("PRAGMA table_info(match_batches)")]
+    if "fingerprint" not in batch_cols:
+        conn.execute("ALTER TABLE match_batches ADD COLUMN fingerprint TEXT")
+        conn.commit()
+
+    # Migration (user_version 1): re-parse deadlines that the formats before
+    # ISO timestamps were accepted could not read
+    if conn.execute("PRAGMA user_version").fetchone()[0] < 1:
+        unparsed = conn.execute(
+            "SELECT id, deadline FROM grants "
+            "WHERE deadline IS NOT NULL AND deadline != '' AND deadline_at IS NULL"
+        ).fetchall()
+        reparsed = [(deadline_at(r["deadline"]), r["id"]) for r in unparsed]
+        conn.executemany(
+            "UPDATE grants SET deadline_at = ? WHERE id = ?", [r for r in reparsed if r[0]]
+        )
+        conn.execute("PRAGMA user_version = 1")
+        conn.commit()
+
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_grants_deadline_at ON grants(deadline_at)")
+    conn.commit()
+
+    _init_fts(conn)
+
     return conn
 
 
-def upsert_grant(conn: sqlite3.Connection, grant: dict[str, Any]) -> None:
-    conn.execute(
-        """
-        INSERT INTO grants (source, external_id, title, agency, description, deadline, url, amount, raw_json)
-        VALUES (:source, :external_id, :title, :agency, :description, :deadline, :url, :amount, :raw_json)
-        ON CONFLICT(source, external_id) DO UPDATE SET
-            title=excluded.title,
-            agency=excluded.agency,
-            description=excluded.description,
-            deadline=excluded.deadline,
-            url=excluded.url,
-            amount=excluded.amount,
-            raw_json=excluded.raw_json
-        """,
-        grant,
-    )
+def _init_fts(conn: sqlite3.Connection) -> None:
+    """Create the full-text index over grants, building it from existing rows once."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'grants_fts'"
+    ).fetchone()
+    # External-content table: the text lives in grants, the triggers keep the
+    # index in step. Score updates don't touch indexed columns, so they don't
+    # fire the update trigger.
+    conn.executescript("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS grants_fts USING fts5(
+            title, agency, description,
+            content='grants', content_rowid='id', tokenize='porter unicode61'
+        );
+
+        CREATE TRIGGER IF NOT EXISTS grants_fts_insert AFTER INSERT ON grants BEGIN
+            INSERT INTO grants_fts (rowid, title, agency, description)
+            VALUES (new.id, new.title, new.agency, new.description);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS grants_fts_delete AFTER DELETE ON grants BEGIN
+            INSERT INTO grants_fts (grants_fts, rowid, title, agency, description)
+            VALUES ('delete', old.id, old.title, old.agency, old.description);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS grants_fts_update
+        AFTER UPDATE OF title, agency, description ON grants BEGIN
+            INSERT INTO grants_fts (grants_fts, rowid, title, agency, description)
+            VALUES ('delete', old.id, old.title, old.agency, old.description);
+            INSERT INTO grants_fts (rowid, title, agency, description)
+            VALUES (new.id, new.title, new.agency, new.description);
+        END;
+    """)
+    if not exists:
+        conn.execute("INSERT INTO grants_fts (grants_fts) VALUES ('rebuild')")
     conn.commit()
 
 
+# Fields that make up a grant's content; raw_json is left out because APIs
+# echo volatile bookkeeping fields that don't change what the grant is
+_CONTENT_FIELDS = ("title", "agency", "description", "deadline", "url", "amount")
+
+
+def content_hash(grant: dict[str, Any]) -> str:
+    """Fingerprint the normalized grant fields."""
+    values = [(grant.get(f) or "").strip() for f in _CONTENT_FIELDS]
+    return hashlib.sha256(json.dumps(values).encode()).hexdigest()
+
+
+# A changed grant drops its score so the matcher picks it up again
+_UPSERT_GRANT_SQL = """
+    INSERT INTO grants (source, external_id, title, agency, description, deadline, deadline_at, url, amount, raw_json, content_hash)
+    VALUES (:source, :external_id, :title, :agency, :description, :deadline, :deadline_at, :url, :amount, :raw_json, :content_hash)
+    ON CONFLICT(source, external_id) DO UPDATE SET
+        title=excluded.title,
+        agency=excluded.agency,
+        description=excluded.description,
+        deadline=excluded.deadline,
+        deadline_at=excluded.deadline_at,
+        url=excluded.url,
+        amount=excluded.amount,
+        raw_json=excluded.raw_json,
+        content_hash=excluded.content_hash,
+        score=NULL,
+        score_reasoning=NULL,
+        matched_at=NULL
+    WHERE grants.content_hash IS NOT excluded.content_hash
+"""
+
+
+@dataclass
+class UpsertStats:
+    new: int = 0
+    changed: int = 0
+    unchanged: int = 0
+
+
+def _stored_hashes(
+    conn: sqlite3.Connection, keys: list[tuple[str, str]]
+) -> dict[tuple[str, str], str | None]:
+    by_source: dict[str, list[str]] = {}
+    for source, external_id in keys:
+        by_source.setdefault(source, []).append(external_id)
+
+    stored = {}
+    for source, ids in by_source.items():
+        for i in range(0, len(ids), 500):
+            chunk = ids[i : i + 500]
+            placeholders = ",".join("?" for _ in chunk)
+            rows = conn.execute(
+                f"SELECT external_id, content_hash FROM grants "
+                f"WHERE source = ? AND external_id IN ({placeholders})",
+                [source, *chunk],
+            ).fetchall()
+            stored.update(((source, r["external_id"]), r["content_hash"]) for r in rows)
+    return stored
+
+
+def upsert_grants(conn: sqlite3.Connection, grants: list[dict[str, Any]]) -> UpsertStats:
+    """Upsert many grants in a single transaction, skipping unchanged ones.
+
+    A grant whose content hash differs from the stored one is rewritten and
+    has its score cleared so it is matched again.
+    """
+    stats = UpsertStats()
+    stored = _stored_hashes(conn, [(g["source"], g["external_id"]) for g in grants])
+
+    rows = []
+    for grant in grants:
+        fingerprint = content_hash(grant)
+        key = (grant["source"], grant["external_id"])
+        if key not in stored:
+            stats.new += 1
+        elif stored[key] != fingerprint:
+            stats.changed += 1
+        else:
+            stats.unchanged += 1
+            continue
+        rows.append({
+            **grant,
+            "content_hash": fingerprint,
+            "deadline_at": deadline_at(grant.get("deadline")),
+        })
+
+    with conn:
+        conn.executemany(_UPSERT_GRANT_SQL, rows)
+    return stats
+
+
+def upsert_grant(conn: sqlite3.Connection, grant: dict[str, Any]) -> UpsertStats:
+    return upsert_grants(conn, [grant])
+
+
+class GrantWriter:
+    """Buffers grants from concurrent source workers and writes them in batches.
+
+    Sources call `upsert` from any thread. Grants are deduped in memory by
+    (source, external_id) for the lifetime of the writer, so an opportunity
+    returned for several keywords is written once. Only the thread that owns
+    `conn` calls `flush`, which writes the buffer in one transaction.
+    `stats` tallies how many flushed grants were new, changed or unchanged.
+    `truncated` names the sources whose results were cut off (e.g. by a page
+    cap), so their watermarks are not advanced past notices never fetched.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, flush_size: int = 500):
+        self.conn = conn
+        self.flush_size = flush_size
+        self.received = 0
+        self.written = 0
+        self.stats = UpsertStats()
+        self._pending: dict[tuple[str, str], dict[str, Any]] = {}
+        self._seen: set[tuple[str, str]] = set()
+        self.truncated: set[str] = set()
+        self._lock = threading.Lock()
+
+    def upsert(self, grant: dict[str, Any]) -> None:
+        key = (grant["source"], grant["external_id"])
+        with self._lock:
+            self.received += 1
+            if key not in self._seen:
+                self._pending[key] = grant
+
+    def mark_truncated(self, source: str) -> None:
+        with self._lock:
+            self.truncated.add(source)
+
+    @property
+    def duplicates(self) -> int:
+        return self.received - self.written - len(self._pending)
+
+    def is_full(self) -> bool:
+        return len(self._pending) >= self.flush_size
+
+    def flush(self) -> int:
+        """Write all buffered grants. Returns count of grants written."""
+        with self._lock:
+            batch = list(self._pending.values())
+            self._seen.update(self._pending)
+            self._pending = {}
+        if batch:
+            stats = upsert_grants(self.conn, batch)
+            self.stats.new += stats.new
+            self.stats.changed += stats.changed
+            self.stats.unchanged += stats.unchanged
+            self.written += len(batch)
+        return len(batch)
+
+
 def grant_count(conn: sqlite3.Connection) -> int:
     return conn.execute("SELECT COUNT(*) FROM grants").fetchone()[0]
 
@@ -70,51 +346,368 @@ def get_unscored_grants(conn: sqlite3.Connection) -> list[dict]:
     return [dict(r) for r in rows]
 
 
+_UPDATE_SCORE_SQL = """
+    UPDATE grants SET score = ?, score_reasoning = ?, matched_at = ?, profile_fingerprint = ?
+    WHERE id = ?
+"""
+
+
+_UPDATE_JOB_SQL = "UPDATE match_jobs SET stage = ?, updated_at = ? WHERE grant_id = ?"
+
+
 def update_score(
-    conn: sqlite3.Connection, grant_id: int, score: int, reasoning: str
+    conn: sqlite3.Connection,
+    grant_id: int,
+    score: int,
+    reasoning: str,
+    fingerprint: str | None = None,
+) -> None:
+    """Store a score along with the fingerprint of the profile that produced it."""
+    update_scores(conn, [(grant_id, score, reasoning)], fingerprint)
+
+
+def update_scores(
+    conn: sqlite3.Connection,
+    scores: list[tuple[int, int, str]],
+    fingerprint: str | None = None,
+    stage: str = "scored",
+) -> None:
+    """Write many (grant_id, score, reasoning) results in one transaction.
+
+    Any match job for those grants moves to `stage` in the same transaction.
+    """
+    with conn:
+        _write_scores(conn, scores, fingerprint, stage)
+
+
+def _write_scores(
+    conn: sqlite3.Connection,
+    scores: list[tuple[int, int, str]],
+    fingerprint: str | None,
+    stage: str,
 ) -> None:
     now = datetime.now(timezone.utc).isoformat()
-    conn.execute(
-        "UPDATE grants SET score = ?, score_reasoning = ?, matched_at = ? WHERE id = ?",
-        (score, reasoning, now, grant_id),
+    conn.executemany(
+        _UPDATE_SCORE_SQL,
+        [(score, reasoning, now, fingerprint, grant_id) for grant_id, score, reasoning in scores],
+    )
+    conn.executemany(_UPDATE_JOB_SQL, [(stage, now, grant_id) for grant_id, _, _ in scores])
+
+
+def copy_duplicate_scores(conn: sqlite3.Connection) -> int:
+    """Give duplicates the score of their canonical grant, if it has one.
+
+    Covers unscored duplicates and those whose canonical grant has since
+    been re-scored against a different profile.
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    cur = conn.execute(
+        """
+        UPDATE grants SET
+            score = (SELECT c.score FROM grants c WHERE c.id = grants.duplicate_of),
+            score_reasoning = (
+                SELECT 'Duplicate of #' || c.id || ' (' || c.source || '): ' || c.score_reasoning
+                FROM grants c WHERE c.id = grants.duplicate_of
+            ),
+            profile_fingerprint = (
+                SELECT c.profile_fingerprint FROM grants c WHERE c.id = grants.duplicate_of
+            ),
+            matched_at = ?
+        WHERE duplicate_of IN (SELECT id FROM grants WHERE score IS NOT NULL)
+          AND (
+            score IS NULL
+            OR profile_fingerprint IS NOT (
+                SELECT c.profile_fingerprint FROM grants c WHERE c.id = grants.duplicate_of
+            )
+          )
+        """,
+        (now,),
     )
     conn.commit()
+    return cur.rowcount
+
+
+def get_stale_grants(conn: sqlite3.Connection, fingerprint: str) -> list[dict]:
+    """Open canonical grants scored against a different profile, most promising first.
+
+    Grants with the highest old scores come first, then those closing
+    soonest, so a capped re-score spends its budget near the top of the
+    report. Scores from before fingerprints were recorded count as stale.
+    """
+    rows = conn.execute(
+        """
+        SELECT * FROM grants
+        WHERE score IS NOT NULL
+          AND duplicate_of IS NULL
+          AND profile_fingerprint IS NOT ?
+          AND (deadline_at IS NULL OR deadline_at >= ?)
+        ORDER BY score DESC, deadline_at IS NULL, deadline_at
+        """,
+        (fingerprint, _utc_now_iso()),
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def get_grants_by_ids(conn: sqlite3.Connection, ids: list[int]) -> dict[int, dict]:
+    grants = {}
+    for i in range(0, len(ids), 500):
+        chunk = ids[i : i + 500]
+        placeholders = ",".join("?" for _ in chunk)
+        rows = conn.execute(f"SELECT * FROM grants WHERE id IN ({placeholders})", chunk)
+        grants.update((r["id"], dict(r)) for r in rows)
+    return grants
+
+
+def save_match_batch(
+    conn: sqlite3.Connection,
+    batch_id: str,
+    stage: str,
+    requests: dict[str, list[int]],
+    fingerprint: str,
+) -> None:
+    """Record a submitted Message Batch and the grants behind each custom_id.
+
+    `fingerprint` is the profile its prompts were built from; its scores
+    are stamped with it when the batch is collected.
+    """
+    with conn:
+        _insert_match_batch(conn, batch_id, stage, requests, fingerprint)
+
+
+def _insert_match_batch(
+    conn: sqlite3.Connection,
+    batch_id: str,
+    stage: str,
+    requests: dict[str, list[int]],
+    fingerprint: str,
+) -> None:
+    now = datetime.now(timezone.utc).isoformat()
+    conn.execute(
+        "INSERT INTO match_batches (id, stage, request_count, submitted_at, fingerprint) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (batch_id, stage, len(requests), now, fingerprint),
+    )
+    conn.executemany(
+        "INSERT INTO match_batch_requests (batch_id, custom_id, grant_ids) VALUES (?, ?, ?)",
+        [(batch_id, custom_id, json.dumps(ids)) for custom_id, ids in requests.items()],
+    )
+
+
+def get_open_match_batches(conn: sqlite3.Connection) -> list[dict]:
+    rows = conn.execute(
+        "SELECT * FROM match_batches WHERE status = 'submitted' ORDER BY submitted_at"
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def get_match_batch_requests(conn: sqlite3.Connection, batch_id: str) -> dict[str, list[int]]:
+    rows = conn.execute(
+        "SELECT custom_id, grant_ids FROM match_batch_requests WHERE batch_id = ?", (batch_id,)
+    ).fetchall()
+    return {r["custom_id"]: json.loads(r["grant_ids"]) for r in rows}
+
+
+def record_match_batch_collected(
+    conn: sqlite3.Connection,
+    batch: dict,
+    scores: list[tuple[int, int, str]],
+    submitted: list[tuple[str, str, dict[str, list[int]], str]],
+) -> None:
+    """Apply a collected batch's results in one transaction.
+
+    Writes its (grant_id, score, reasoning) `scores` under the fingerprint
+    stored with the batch, records the batches `submitted` for its
+    candidates as (batch_id, stage, requests, fingerprint), and marks it
+    collected. A crash part-way leaves the batch open with nothing
+    applied, so the next collect starts it over.
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    stage = "rejected" if batch["stage"] == "triage" else "scored"
+    with conn:
+        _write_scores(conn, scores, batch["fingerprint"], stage)
+        for new_batch in submitted:
+            _insert_match_batch(conn, *new_batch)
+        conn.execute(
+            "UPDATE match_batches SET status = 'collected', collected_at = ? WHERE id = ?",
+            (now, batch["id"]),
+        )
+
+
+def get_pending_batch_grant_ids(conn: sqlite3.Connection) -> set[int]:
+    """Grants submitted in a Message Batch whose results haven't been applied yet."""
+    rows = conn.execute(
+        """
+        SELECT r.grant_ids FROM match_batch_requests r
+        JOIN match_batches b ON b.id = r.batch_id
+        WHERE b.status = 'submitted'
+        """
+    ).fetchall()
+    return {grant_id for r in rows for grant_id in json.loads(r["grant_ids"])}
+
+
+def queue_match_jobs(conn: sqlite3.Connection, grant_ids: list[int], fingerprint: str) -> None:
+    """Start (or restart) a match job awaiting triage for each grant.
+
+    Jobs of grants that no longer exist are dropped at the same time.
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    with conn:
+        conn.execute("DELETE FROM match_jobs WHERE grant_id NOT IN (SELECT id FROM grants)")
+        conn.executemany(
+            """
+            INSERT INTO match_jobs (grant_id, stage, fingerprint, updated_at)
+            VALUES (?, 'pending', ?, ?)
+            ON CONFLICT(grant_id) DO UPDATE SET
+                stage = 'pending',
+                attempts = CASE WHEN fingerprint IS excluded.fingerprint THEN attempts ELSE 0 END,
+                fingerprint = excluded.fingerprint,
+                updated_at = excluded.updated_at
+            """,
+            [(grant_id, fingerprint, now) for grant_id in grant_ids],
+        )
+
+
+def get_match_candidates(conn: sqlite3.Connection, fingerprint: str) -> set[int]:
+    """Grants that passed triage for this profile but were never scored."""
+    rows = conn.execute(
+        "SELECT grant_id FROM match_jobs WHERE stage = 'candidate' AND fingerprint = ?",
+        (fingerprint,),
+    ).fetchall()
+    return {r["grant_id"] for r in rows}
+
+
+def record_triage(
+    conn: sqlite3.Connection,
+    rejected: list[tuple[int, int, str]],
+    candidate_ids: list[int],
+    fingerprint: str,
+) -> None:
+    """Store one triage result: score rejected grants and mark the rest as candidates.
+
+    Both happen in one transaction, so a crash never leaves a triaged
+    batch half-recorded.
+    """
+    now = datetime.now(timezone.utc).isoformat()
+    with conn:
+        _write_scores(conn, rejected, fingerprint, "rejected")
+        conn.executemany(_UPDATE_JOB_SQL, [("candidate", now, i) for i in candidate_ids])
+
+
+def record_match_failure(conn: sqlite3.Connection, grant_ids: list[int], error: str) -> None:
+    now = datetime.now(timezone.utc).isoformat()
+    with conn:
+        conn.executemany(
+            """
+            UPDATE match_jobs SET attempts = attempts + 1, last_error = ?, updated_at = ?
+            WHERE grant_id = ?
+            """,
+            [(error, now, grant_id) for grant_id in grant_ids],
+        )
+
+
+def get_match_job_counts(conn: sqlite3.Connection) -> dict[str, int]:
+    rows = conn.execute("SELECT stage, COUNT(*) AS n FROM match_jobs GROUP BY stage").fetchall()
+    return {r["stage"]: r["n"] for r in rows}
+
+
+def get_failed_match_jobs(conn: sqlite3.Connection, limit: int = 10) -> list[dict]:
+    """Unfinished jobs that have failed at least once, most attempts first."""
+    rows = conn.execute(
+        """
+        SELECT j.*, g.title FROM match_jobs j JOIN grants g ON g.id = j.grant_id
+        WHERE j.stage IN ('pending', 'candidate') AND j.attempts > 0
+        ORDER BY j.attempts DESC, j.updated_at DESC
+        LIMIT ?
+        """,
+        (limit,),
+    ).fetchall()
+    return [dict(r) for r in rows]
 
 
 def upsert_proposal(
     conn: sqlite3.Connection, filename: str, text: str, file_hash: str
+) -> None:
+    upsert_proposals(conn, [(filename, text, file_hash)])
+
+
+def upsert_proposals(
+    conn: sqlite3.Connection, proposals: list[tuple[str, str, str]]
+) -> None:
+    """Write (filename, text, file_hash) rows in one transaction."""
+    now = datetime.now(timezone.utc).isoformat()
+    with conn:
+        conn.executemany(
+            """
+            INSERT INTO proposals (filename, text, file_hash, ingested_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(filename) DO UPDATE SET
+                text=excluded.text,
+                file_hash=excluded.file_hash,
+                ingested_at=excluded.ingested_at
+            """,
+            [(filename, text, file_hash, now) for filename, text, file_hash in proposals],
+        )
+
+
+def get_proposals(conn: sqlite3.Connection) -> list[dict]:
+    rows = conn.execute("SELECT * FROM proposals ORDER BY ingested_at DESC").fetchall()
+    return [dict(r) for r in rows]
+
+
+def get_source_watermark(conn: sqlite3.Connection, source: str) -> datetime | None:
+    """Return when the source's last successful search started, if it ever succeeded."""
+    row = conn.execute(
+        "SELECT watermark FROM source_state WHERE source = ?", (source,)
+    ).fetchone()
+    if not row or not row["watermark"]:
+        return None
+    return datetime.fromisoformat(row["watermark"])
+
+
+def set_source_watermark(
+    conn: sqlite3.Connection, source: str, watermark: datetime, count: int
 ) -> None:
     now = datetime.now(timezone.utc).isoformat()
     conn.execute(
         """
-        INSERT INTO proposals (filename, text, file_hash, ingested_at)
+        INSERT INTO source_state (source, watermark, last_count, updated_at)
         VALUES (?, ?, ?, ?)
-        ON CONFLICT(filename) DO UPDATE SET
-            text=excluded.text,
-            file_hash=excluded.file_hash,
-            ingested_at=excluded.ingested_at
+        ON CONFLICT(source) DO UPDATE SET
+            watermark=excluded.watermark,
+            last_count=excluded.last_count,
+            updated_at=excluded.updated_at
         """,
-        (filename, text, file_hash, now),
+        (source, watermark.isoformat(), count, now),
     )
     conn.commit()
 
 
-def get_proposals(conn: sqlite3.Connection) -> list[dict]:
-    rows = conn.execute("SELECT * FROM proposals ORDER BY ingested_at DESC").fetchall()
+def get_scored_grants(conn: sqlite3.Connection, include_expired: bool = True) -> list[dict]:
+    query = "SELECT * FROM grants WHERE score IS NOT NULL"
+    params = []
+    if not include_expired:
+        query += " AND (deadline_at IS NULL OR deadline_at >= ?)"
+        params.append(_utc_now_iso())
+    rows = conn.execute(query + " ORDER BY score DESC", params).fetchall()
     return [dict(r) for r in rows]
 
 
-def get_scored_grants(conn: sqlite3.Connection) -> list[dict]:
-    rows = conn.execute(
-        "SELECT * FROM grants WHERE score IS NOT NULL ORDER BY score DESC"
-    ).fetchall()
-    return [dict(r) for r in rows]
+_ISO_TIMESTAMP = re.compile(r"\d{4}-\d{2}-\d{2}T")
 
 
 def _parse_deadline(deadline: str) -> datetime | None:
     """Try to parse a deadline string in any of the formats used by our sources."""
     if not deadline:
         return None
+    # sam.gov: 2026-11-03T17:00:00-05:00. Only full timestamps: fromisoformat
+    # would read ted's 2024-02-16+01:00 as a time of day
+    if _ISO_TIMESTAMP.match(deadline):
+        try:
+            dt = datetime.fromisoformat(deadline)
+        except ValueError:
+            pass
+        else:
+            return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
     for fmt in (
         "%m/%d/%Y",                    # grants.gov: 03/31/2027
         "%a, %d %b %Y %H:%M:%S %Z",   # eu.funding: Thu, 25 Jul 2024 22:00:00 GMT
@@ -133,22 +726,84 @@ def _parse_deadline(deadline: str) -> datetime | None:
     return None
 
 
-def purge_expired_grants(conn: sqlite3.Connection) -> int:
-    """Delete grants whose deadline has passed. Returns count of deleted rows."""
-    now = datetime.now(timezone.utc)
+def deadline_at(deadline: str | None) -> str | None:
+    """Normalize a source deadline to a UTC ISO timestamp, or None if unparseable."""
+    dt = _parse_deadline((deadline or "").strip())
+    return dt.astimezone(timezone.utc).isoformat() if dt else None
+
+
+def _utc_now_iso() -> str:
+    # Same shape as deadline_at values, so the two compare as strings
+    return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+
+
+def get_unparsed_deadlines(conn: sqlite3.Connection) -> list[dict]:
+    """Grants whose deadline text matched none of the known formats."""
     rows = conn.execute(
-        "SELECT id, deadline FROM grants WHERE deadline IS NOT NULL AND deadline != ''"
+        """
+        SELECT id, source, external_id, title, deadline FROM grants
+        WHERE deadline IS NOT NULL AND deadline != '' AND deadline_at IS NULL
+        ORDER BY source, id
+        """
     ).fetchall()
+    return [dict(r) for r in rows]
 
-    expired_ids = []
-    for row in rows:
-        dt = _parse_deadline(row["deadline"])
-        if dt and dt < now:
-            expired_ids.append(row["id"])
 
-    if expired_ids:
-        placeholders = ",".join("?" for _ in expired_ids)
-        conn.execute(f"DELETE FROM grants WHERE id IN ({placeholders})", expired_ids)
-        conn.commit()
+def purge_expired_grants(conn: sqlite3.Connection) -> int:
+    """Delete grants whose deadline has passed. Returns count of deleted rows."""
+    cur = conn.execute("DELETE FROM grants WHERE deadline_at < ?", (_utc_now_iso(),))
+    conn.commit()
+    return cur.rowcount
+
+
+def _fts_query(text: str) -> str:
+    """Quote each word so user input is matched literally (all words must match)."""
+    return " ".join('"' + word.replace('"', '""') + '"' for word in text.split())
+
 
-    return len(expired_ids)
+def find_grants(
+    conn: sqlite3.Connection,
+    query: str,
+    sources: list[str] | None = None,
+    deadline_after: datetime | None = None,
+    deadline_before: datetime | None = None,
+    min_score: int | None = None,
+    include_expired: bool = False,
+    limit: int = 20,
+) -> list[dict]:
+    """Rank stored grants against a full-text query with bm25, best match first.
+
+    Title matches weigh more than agency and description matches. Each
+    result carries a `snippet` of the matching description text.
+    """
+    where = ["grants_fts MATCH ?"]
+    params: list[Any] = [_fts_query(query)]
+    if sources:
+        where.append(f"g.source IN ({','.join('?' for _ in sources)})")
+        params.extend(sources)
+    if not include_expired:
+        where.append("(g.deadline_at IS NULL OR g.deadline_at >= ?)")
+        params.append(_utc_now_iso())
+    if deadline_after:
+        where.append("g.deadline_at >= ?")
+        params.append(deadline_after.astimezone(timezone.utc).isoformat())
+    if deadline_before:
+        where.append("g.deadline_at < ?")
+        params.append(deadline_before.astimezone(timezone.utc).isoformat())
+    if min_score is not None:
+        where.append("g.score >= ?")
+        params.append(min_score)
+
+    rows = conn.execute(
+        f"""
+        SELECT g.*,
+               bm25(grants_fts, 10.0, 2.0, 1.0) AS rank,
+               snippet(grants_fts, 2, '[', ']', '…', 16) AS snippet
+        FROM grants_fts JOIN grants g ON g.id = grants_fts.rowid
+        WHERE {' AND '.join(where)}
+        ORDER BY rank
+        LIMIT ?
+        """,
+        [*params, limit],
+    ).fetchall()
+    return [dict(r) for r in rows]
@@ -0,0 +1,154 @@
+import hashlib
+import random
+import re
+from array import array
+from collections import defaultdict
+from sqlite3 import Connection
+
+# MinHash signature length, split into BANDS bands of ROWS values for LSH.
+# Two grants land in a shared bucket with high probability once their
+# Jaccard similarity passes roughly (1 / BANDS) ** (1 / ROWS) ≈ 0.5.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+
+# Estimated Jaccard similarity above which two grants are the same opportunity
+SIMILARITY_THRESHOLD = 0.7
+
+# Only this much of the description is shingled; the opening carries the
+# identifying text and long bodies would only slow hashing down
+DESCRIPTION_CHARS = 1000
+SHINGLE_WORDS = 3
+# Texts this short (in shingles) are too generic to cluster reliably
+MIN_SHINGLES = 4
+
+# Each "permutation" XORs the 64-bit shingle hashes with a random mask.
+# Shingle hashes are already uniformly random, so this estimates Jaccard
+# just as well as a universal hash while letting min() run over map() in C.
+# Fixed seed: stored signatures must stay comparable across runs.
+_MASKS = [random.Random(20240601 + i).getrandbits(64) for i in range(NUM_PERM)]
+
+
+def _shingles(title: str, description: str) -> set[str]:
+    text = f"{title} {(description or '')[:DESCRIPTION_CHARS]}".lower()
+    words = re.findall(r"[a-z0-9]+", text)
+    if len(words) < SHINGLE_WORDS:
+        return set(words)
+    return {
+        " ".join(words[i : i + SHINGLE_WORDS])
+        for i in range(len(words) - SHINGLE_WORDS + 1)
+    }
+
+
+def minhash(title: str, description: str) -> array | None:
+    """MinHash signature of a grant's title and description, or None if too short."""
+    shingles = _shingles(title, description)
+    if len(shingles) < MIN_SHINGLES:
+        return None
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "little")
+        for s in shingles
+    ]
+    return array("Q", (min(map(mask.__xor__, hashes)) for mask in _MASKS))
+
+
+def _similarity(a: array, b: array) -> float:
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def _refresh_signatures(conn: Connection) -> dict[int, array]:
+    """Compute signatures for new or changed grants and return all of them."""
+    conn.execute(
+        "DELETE FROM grant_signatures WHERE grant_id NOT IN (SELECT id FROM grants)"
+    )
+    stale = conn.execute(
+        """
+        SELECT g.id, g.title, g.description, g.content_hash
+        FROM grants g LEFT JOIN grant_signatures s ON s.grant_id = g.id
+        WHERE s.grant_id IS NULL OR s.content_hash IS NOT g.content_hash
+        """
+    ).fetchall()
+
+    rows = []
+    for r in stale:
+        sig = minhash(r["title"] or "", r["description"] or "")
+        rows.append((r["id"], r["content_hash"], sig.tobytes() if sig else None))
+    conn.executemany(
+        """
+        INSERT INTO grant_signatures (grant_id, content_hash, signature) VALUES (?, ?, ?)
+        ON CONFLICT(grant_id) DO UPDATE SET
+            content_hash=excluded.content_hash,
+            signature=excluded.signature
+        """,
+        rows,
+    )
+    conn.commit()
+
+    signatures = {}
+    for r in conn.execute(
+        "SELECT grant_id, signature FROM grant_signatures WHERE signature IS NOT NULL"
+    ):
+        sig = array("Q")
+        sig.frombytes(r["signature"])
+        signatures[r["grant_id"]] = sig
+    return signatures
+
+
+def assign_duplicates(conn: Connection) -> int:
+    """Cluster near-duplicate grants across sources and record each one's canonical grant.
+
+    Grants are bucketed by LSH bands of their MinHash signatures, so only
+    grants sharing a bucket are ever compared. Pairs from different sources
+    whose estimated similarity passes SIMILARITY_THRESHOLD are merged into a
+    cluster; same-source pairs are left alone since one source often lists
+    related-but-distinct calls with shared boilerplate. The canonical grant
+    of a cluster is an already-scored member if there is one, else the
+    oldest. Sets `grants.duplicate_of` for every other member and returns
+    how many grants are duplicates.
+    """
+    signatures = _refresh_signatures(conn)
+    grant_info = {
+        r["id"]: (r["source"], r["score"] is not None)
+        for r in conn.execute("SELECT id, source, score FROM grants")
+    }
+
+    buckets: dict[tuple, list[int]] = defaultdict(list)
+    for grant_id, sig in signatures.items():
+        for band in range(BANDS):
+            start = band * ROWS
+            buckets[(band, *sig[start : start + ROWS])].append(grant_id)
+
+    parent: dict[int, int] = {}
+
+    def find(x: int) -> int:
+        parent.setdefault(x, x)
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    compared = set()
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        for i, a in enumerate(members):
+            for b in members[i + 1 :]:
+                if grant_info[a][0] == grant_info[b][0] or (a, b) in compared:
+                    continue
+                compared.add((a, b))
+                if _similarity(signatures[a], signatures[b]) >= SIMILARITY_THRESHOLD:
+                    parent[find(a)] = find(b)
+
+    clusters: dict[int, list[int]] = defaultdict(list)
+    for grant_id in parent:
+        clusters[find(grant_id)].append(grant_id)
+
+    duplicate_of = []
+    for members in clusters.values():
+        canonical = min(members, key=lambda g: (not grant_info[g][1], g))
+        duplicate_of.extend((canonical, g) for g in members if g != canonical)
+
+    with conn:
+        conn.execute("UPDATE grants SET duplicate_of = NULL WHERE duplicate_of IS NOT NULL")
+        conn.executemany("UPDATE grants SET duplicate_of = ? WHERE id = ?", duplicate_of)
+    return len(duplicate_of)
@@ -0,0 +1,232 @@
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import partial
+from typing import Any, Callable
+
+import anthropic
+import httpx
+
+from grant_researcher import llm_cache, telemetry
+from grant_researcher.telemetry import CallInfo
+
+# Requests in flight at once across the whole process, and per model
+MAX_CONCURRENCY = 16
+MODEL_CONCURRENCY = 8
+
+# Retries after the API pushes back with 429 (rate limited) or 529 (overloaded),
+# or the connection drops
+MAX_RETRIES = 5
+# Backoff without a Retry-After header: 2, 4, 8, 16, 32s, plus jitter
+BACKOFF_BASE = 2.0
+
+# AIMD: a push-back multiplies the limit by this; each success adds 1/limit
+DECREASE_FACTOR = 0.5
+# Push-backs within this many seconds of a decrease count as the same event
+DECREASE_COOLDOWN = 2.0
+
+# How a request held in an AdaptiveLimit ended
+SUCCESS = "success"
+THROTTLED = "throttled"  # 429/529
+FAILED = "failed"  # any other error; leaves the limit unchanged
+
+TIMEOUT = httpx.Timeout(600.0, connect=10.0)
+LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16, keepalive_expiry=60)
+
+
+@dataclass
+class LimitStats:
+    requests: int = 0
+    retries: int = 0
+    throttled: int = 0  # 429/529 responses
+    min_limit: float = 0.0  # lowest the adaptive limit went
+
+
+class AdaptiveLimit:
+    """Concurrency limit that backs off on overload and recovers on success.
+
+    The limit halves when the API answers 429/529 (at most once per
+    DECREASE_COOLDOWN, so a burst of rejections from requests already in
+    flight counts once) and grows by about one slot per `limit` successful
+    requests, never above `maximum`. Other failures say nothing about
+    capacity and leave it unchanged. Callers block in `acquire` while the
+    number in flight is at the current limit.
+    """
+
+    def __init__(self, maximum: int):
+        self.maximum = maximum
+        self.limit = float(maximum)
+        self.in_flight = 0
+        self.stats = LimitStats(min_limit=float(maximum))
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self.in_flight >= max(1, int(self.limit)):
+                self._cond.wait()
+            self.in_flight += 1
+            self.stats.requests += 1
+
+    def release(self, outcome: str, retrying: bool = False) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            self.stats.retries += retrying
+            now = time.monotonic()
+            if outcome == THROTTLED:
+                self.stats.throttled += 1
+                if now - self._last_decrease >= DECREASE_COOLDOWN:
+                    self.limit = max(1.0, self.limit * DECREASE_FACTOR)
+                    self.stats.min_limit = min(self.stats.min_limit, self.limit)
+                    self._last_decrease = now
+            elif outcome == SUCCESS:
+                self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+_clients: dict[str, anthropic.Anthropic] = {}
+_global = AdaptiveLimit(MAX_CONCURRENCY)
+_models: dict[str, AdaptiveLimit] = {}
+_model_concurrency = MODEL_CONCURRENCY
+_lock = threading.Lock()
+
+
+def get_client(api_key: str) -> anthropic.Anthropic:
+    """Return the process-wide client for `api_key`, shared by all callers and threads."""
+    if not api_key:
+        raise RuntimeError("ANTHROPIC_API_KEY not set. Add it to your .env file.")
+    with _lock:
+        client = _clients.get(api_key)
+        if client is None:
+            # Retries are handled by create(), which also adapts concurrency
+            client = anthropic.Anthropic(
+                api_key=api_key,
+                max_retries=0,
+                timeout=TIMEOUT,
+                http_client=anthropic.DefaultHttpxClient(limits=LIMITS),
+            )
+            _clients[api_key] = client
+        return client
+
+
+def configure(
+    max_concurrency: int = MAX_CONCURRENCY, model_concurrency: int = MODEL_CONCURRENCY
+) -> None:
+    """Reset the concurrency limits, e.g. for a different API tier."""
+    global _global, _model_concurrency
+    with _lock:
+        _global = AdaptiveLimit(max_concurrency)
+        _model_concurrency = model_concurrency
+        _models.clear()
+
+
+def _model_limit(model: str) -> AdaptiveLimit:
+    with _lock:
+        limit = _models.get(model)
+        if limit is None:
+            limit = _models[model] = AdaptiveLimit(_model_concurrency)
+        return limit
+
+
+def _backoff(attempt: int) -> float:
+    return BACKOFF_BASE * (2 ** attempt) * (1 + random.random() / 2)
+
+
+def _retry_after(error: anthropic.APIStatusError, attempt: int) -> float:
+    header = error.response.headers.get("retry-after")
+    if header:
+        try:
+            return max(0.0, float(header))
+        except ValueError:
+            pass
+    return _backoff(attempt)
+
+
+def _send(client: anthropic.Anthropic, info: CallInfo | None = None, **params) -> Any:
+    """Send one message within the global and per-model limits, retrying push-back.
+
+    Returns the response message; raises the last error once retries run out.
+    The call is recorded by `telemetry` either way.
+    """
+    model_limit = _model_limit(params["model"])
+    global_limit = _global
+    started_at = datetime.now(timezone.utc)
+    start = time.monotonic()
+    for attempt in range(MAX_RETRIES + 1):
+        model_limit.acquire()
+        global_limit.acquire()
+        attempt_start = time.monotonic()
+        outcome, retrying = FAILED, False
+        try:
+            message = client.messages.create(**params)
+        except anthropic.APIStatusError as e:
+            if e.status_code in (429, 529):
+                outcome = THROTTLED
+            if outcome == FAILED or attempt == MAX_RETRIES:
+                _record_failure(info, params["model"], started_at, start, attempt_start, attempt, e)
+                raise
+            retrying = True
+            delay = _retry_after(e, attempt)
+        except anthropic.APIConnectionError as e:
+            if attempt == MAX_RETRIES:
+                _record_failure(info, params["model"], started_at, start, attempt_start, attempt, e)
+                raise
+            retrying = True
+            delay = _backoff(attempt)
+        else:
+            outcome = SUCCESS
+            now = time.monotonic()
+            telemetry.record(
+                info, params["model"], started_at, usage=message.usage,
+                latency=now - attempt_start, total=now - start, retries=attempt,
+            )
+            return message
+        finally:
+            global_limit.release(outcome)
+            model_limit.release(outcome, retrying)
+        time.sleep(delay)
+    raise AssertionError("unreachable")
+
+
+def _record_failure(
+    info: CallInfo | None,
+    model: str,
+    started_at: datetime,
+    start: float,
+    attempt_start: float,
+    attempt: int,
+    error: Exception,
+) -> None:
+    now = time.monotonic()
+    telemetry.record(
+        info, model, started_at, latency=now - attempt_start, total=now - start,
+        retries=attempt, error=f"{type(error).__name__}: {error}",
+    )
+
+
+def create(
+    client: anthropic.Anthropic,
+    cache: bool = False,
+    info: CallInfo | None = None,
+    validate: Callable[[Any], Any] | None = None,
+    **params,
+) -> Any:
+    """Send a Messages API request through the gateway.
+
+    Every Claude call in the project goes through here. With `cache`, a
+    response stored by `llm_cache` is returned instead when there is one;
+    `validate` keeps responses it rejects with ValueError out of the cache.
+    `info` says where the call comes from, for the `llm_calls` telemetry.
+    """
+    send = partial(_send, client, info)
+    if cache:
+        return llm_cache.create(send, validate, **params)
+    return send(**params)
+
+
+def stats() -> dict[str, LimitStats]:
+    """Per-model request, retry and push-back counters since the process started."""
+    with _lock:
+        return {model: limit.stats for model, limit in _models.items()}
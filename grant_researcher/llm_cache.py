@@ -0,0 +1,237 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+# Entries older than this are treated as misses and dropped
+DEFAULT_TTL = 30 * 24 * 3600
+# Least recently used entries are evicted once responses exceed this size
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+_conn: sqlite3.Connection | None = None
+_ttl = DEFAULT_TTL
+_max_bytes = DEFAULT_MAX_BYTES
+_total_bytes = 0
+_lock = threading.Lock()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0  # entries dropped for size or age
+
+
+_stats = CacheStats()
+
+
+@dataclass
+class CachedTextBlock:
+    text: str
+    type: str = "text"
+
+
+@dataclass
+class CachedMessage:
+    """A response replayed from the cache, shaped like an API message.
+
+    `usage` is None because nothing was billed.
+    """
+
+    model: str
+    content: list[CachedTextBlock]
+    stop_reason: str | None
+    usage: Any = None
+    cached: bool = field(default=True, repr=False)
+
+
+def configure(
+    path: Path | None, ttl: float = DEFAULT_TTL, max_bytes: int = DEFAULT_MAX_BYTES
+) -> None:
+    """Open the cache database at `path`. None disables the cache."""
+    global _conn, _ttl, _max_bytes, _total_bytes
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+        _ttl, _max_bytes = ttl, max_bytes
+        if path is None:
+            return
+
+        # Shared by the matcher's worker threads; every access holds _lock
+        _conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.executescript("""
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_llm_responses_last_used
+                ON llm_responses(last_used);
+        """)
+        with _conn:
+            expired = _conn.execute(
+                "DELETE FROM llm_responses WHERE created_at < ?", (time.time() - _ttl,)
+            ).rowcount
+        _stats.evictions += expired
+        _total_bytes = _conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM llm_responses"
+        ).fetchone()[0]
+        if _total_bytes > _max_bytes:
+            _evict()
+
+
+def cache_key(params: dict) -> str:
+    """Hash of everything that determines a response: model, prompt, max_tokens, temperature."""
+    material = {
+        "model": params.get("model"),
+        "system": params.get("system"),
+        "messages": params.get("messages"),
+        "max_tokens": params.get("max_tokens"),
+        "temperature": params.get("temperature"),
+    }
+    return hashlib.sha256(
+        json.dumps(material, sort_keys=True, ensure_ascii=False).encode()
+    ).hexdigest()
+
+
+def lookup(params: dict) -> CachedMessage | None:
+    """The cached response for these request parameters, if there is a fresh one."""
+    if _conn is None:
+        return None
+    key = cache_key(params)
+    now = time.time()
+    with _lock:
+        row = _conn.execute(
+            "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] < now - _ttl:
+            if row is not None:
+                _delete(key)
+                _stats.evictions += 1
+            _stats.misses += 1
+            return None
+        with _conn:
+            _conn.execute(
+                "UPDATE llm_responses SET last_used = ?, hits = hits + 1 WHERE key = ?",
+                (now, key),
+            )
+        _stats.hits += 1
+
+    data = json.loads(row[0])
+    return CachedMessage(
+        model=data["model"],
+        content=[CachedTextBlock(text) for text in data["content"]],
+        stop_reason=data["stop_reason"],
+    )
+
+
+def store(params: dict, message: Any) -> None:
+    """Cache a complete response; truncated ones are left to be retried."""
+    global _total_bytes
+    if _conn is None or getattr(message, "stop_reason", None) == "max_tokens":
+        return
+    response = json.dumps({
+        "model": message.model,
+        "content": [b.text for b in message.content if b.type == "text"],
+        "stop_reason": message.stop_reason,
+    })
+    key = cache_key(params)
+    now = time.time()
+    with _lock:
+        _delete(key)
+        with _conn:
+            _conn.execute(
+                "INSERT INTO llm_responses (key, model, response, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, message.model, response, len(response), now, now),
+            )
+        _total_bytes += len(response)
+        _stats.stores += 1
+        if _total_bytes > _max_bytes:
+            _evict()
+
+
+def discard(params: dict) -> None:
+    """Drop the cached response for these request parameters, if any."""
+    if _conn is None:
+        return
+    with _lock:
+        _delete(cache_key(params))
+
+
+def _delete(key: str) -> None:
+    global _total_bytes
+    row = _conn.execute("SELECT size FROM llm_responses WHERE key = ?", (key,)).fetchone()
+    if row is not None:
+        with _conn:
+            _conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+        _total_bytes -= row[0]
+
+
+def _evict() -> None:
+    """Drop least recently used entries until the cache is at 90% of its size limit."""
+    global _total_bytes
+    target = _max_bytes * 0.9
+    evicted = []
+    for key, size in _conn.execute(
+        "SELECT key, size FROM llm_responses ORDER BY last_used"
+    ):
+        if _total_bytes <= target:
+            break
+        evicted.append((key,))
+        _total_bytes -= size
+    with _conn:
+        _conn.executemany("DELETE FROM llm_responses WHERE key = ?", evicted)
+    _stats.evictions += len(evicted)
+
+
+def create(
+    send: Callable[..., Any], validate: Callable[[Any], Any] | None = None, **params
+) -> Any:
+    """Return the cached response for `params`, or call `send(**params)` and cache it.
+
+    `send` is `client.messages.create` or a wrapper around it with retries.
+    `validate` raises ValueError for a response the caller cannot use; such
+    a response is returned uncached so the next run asks again, and a
+    cached one that fails is dropped and fetched afresh.
+    """
+    cached = lookup(params)
+    if cached is not None:
+        try:
+            if validate:
+                validate(cached)
+            return cached
+        except ValueError:
+            discard(params)
+    message = send(**params)
+    if validate:
+        try:
+            validate(message)
+        except ValueError:
+            return message
+    store(params, message)
+    return message
+
+
+def stats() -> CacheStats:
+    """Hit, miss, store and eviction counts since the process started."""
+    return _stats
+
+
+def summary() -> tuple[int, int]:
+    """(entries, bytes) currently in the cache."""
+    if _conn is None:
+        return 0, 0
+    with _lock:
+        return _conn.execute("SELECT COUNT(*), ? FROM llm_responses", (_total_bytes,)).fetchone()
@@ -1,19 +1,52 @@
+import hashlib
 import math
 import re
+import uuid
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
 from sqlite3 import Connection
-from typing import Callable
+from typing import Any, Callable
 
 import anthropic
 
+from grant_researcher import llm
 from grant_researcher.config import Config
-from grant_researcher.db import get_proposals, get_unscored_grants, update_score
-
-BATCH_SIZE = 10
-
-
-def _build_batch_filter_prompt(
-    grants: list[dict], config: Config, proposal_texts: list[str]
-) -> str:
+from grant_researcher.db import (
+    copy_duplicate_scores,
+    get_match_candidates,
+    get_pending_batch_grant_ids,
+    get_proposals,
+    get_stale_grants,
+    get_unscored_grants,
+    queue_match_jobs,
+    record_match_failure,
+    record_triage,
+    update_score,
+    update_scores,
+)
+from grant_researcher.dedupe import assign_duplicates
+from grant_researcher.prefilter import (
+    REJECT_REASON,
+    TRIAGE_REJECT_REASON,
+    corpus,
+    score_grants,
+)
+from grant_researcher.telemetry import CallInfo, rollup
+
+TRIAGE_MODEL = "claude-haiku-4-5-20251001"
+SCORING_MODEL = "claude-sonnet-4-5-20250929"
+
+# Rough token estimate for packing triage batches; no tokenizer call needed
+CHARS_PER_TOKEN = 4
+# Cap on grants per triage request, however short they are
+MAX_TRIAGE_BATCH = 50
+# Output budget for a triage response: a comma-separated list of numbers
+TRIAGE_BASE_TOKENS = 16
+TRIAGE_TOKENS_PER_GRANT = 4
+
+
+def _company_context(config: Config, proposal_texts: list[str]) -> str:
     proposals_section = ""
     if proposal_texts:
         condensed = []
@@ -24,26 +57,44 @@ def _build_batch_filter_prompt(
             "\n\n## Company Proposals (for context)\n" + "\n\n".join(condensed)
         )
 
-    grant_list = []
-    for i, g in enumerate(grants, 1):
-        desc_snippet = (g["description"] or "N/A")[:300]
-        grant_list.append(f"{i}. {g['title']} | {g['agency']} | {desc_snippet}")
-    grants_text = "\n".join(grant_list)
-
-    return f"""You are filtering government grant opportunities for relevance to a company.
-
-## Company Profile
+    return f"""## Company Profile
 - Name: {config.company.name}
 - Description: {config.company.description}
 - Focus Areas: {', '.join(config.company.focus_areas)}
 - Eligibility: {', '.join(config.company.eligibility)}
-{proposals_section}
+{proposals_section}"""
+
+
+def profile_fingerprint(config: Config, proposal_texts: list[str]) -> str:
+    """Hash of the company context that prompts are built from.
+
+    Stored with every score, so scores made against an older profile can be
+    found and refreshed with `match --rescore-stale`. Only what the model
+    sees counts: proposal text past the prompt's excerpt does not, while
+    the order of the proposals does.
+    """
+    context = _company_context(config, proposal_texts)
+    return hashlib.sha256(context.encode()).hexdigest()[:16]
+
+
+def _cached_system(text: str) -> list[dict]:
+    """A system prompt marked for prompt caching.
 
-## Grant Opportunities
-{grants_text}
+    The system block holds everything that is the same across a run's
+    requests (instructions, company profile, proposals), so it is billed
+    at the cached rate after the first request; grant text goes in the
+    user message after it.
+    """
+    return [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]
+
+
+def _build_batch_filter_system(config: Config, proposal_texts: list[str]) -> str:
+    return f"""You are filtering government grant opportunities for relevance to a company.
+
+{_company_context(config, proposal_texts)}
 
 ## Instructions
-Review each grant and identify which ones are potentially relevant to the company (would score above 20 out of 100). A grant can be relevant for ANY of these reasons:
+The user lists grant opportunities. Review each grant and identify which ones are potentially relevant to the company (would score above 20 out of 100). A grant can be relevant for ANY of these reasons:
 1. Domain relevance — the grant targets the company's industry or focus areas
 2. Technology/capability match — the grant funds technologies the company works with (e.g. AI, machine learning, generative AI) even if the grant is not industry-specific
 3. Eligibility fit — the grant targets a category the company belongs to (e.g. SME, small business, startup)
@@ -55,51 +106,93 @@ Respond with ONLY a comma-separated list of the grant numbers that are potential
 Example response: 1, 3, 7"""
 
 
-def _parse_batch_filter_response(text: str, grants: list[dict]) -> list[dict]:
+def _estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _snippet(description: str | None, max_tokens: int) -> str:
+    """The start of a description, cut at a word boundary to fit `max_tokens`."""
+    text = " ".join((description or "N/A").split())
+    limit = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text.rfind(" ", 0, limit)
+    return text[: cut if cut > limit // 2 else limit] + "…"
+
+
+def _triage_line(i: int, grant: dict, snippet_tokens: int) -> str:
+    snippet = _snippet(grant["description"], snippet_tokens)
+    return f"{i}. {grant['title']} | {grant['agency']} | {snippet}"
+
+
+def pack_triage_batches(grants: list[dict], config: Config) -> list[list[dict]]:
+    """Split grants into triage batches by estimated prompt size rather than count.
+
+    Grants are packed in order until the next one would push the user
+    message past `triage_batch_tokens`, or the batch reaches
+    MAX_TRIAGE_BATCH. Short stubs share a request with many others, while
+    long descriptions are cut to `triage_snippet_tokens` each.
+    """
+    budget = max(1, config.matcher.triage_batch_tokens)
+    snippet_tokens = max(1, config.matcher.triage_snippet_tokens)
+    batches: list[list[dict]] = []
+    batch: list[dict] = []
+    used = 0
+    for grant in grants:
+        # The index width barely changes the size; estimate with the largest
+        tokens = _estimate_tokens(_triage_line(MAX_TRIAGE_BATCH, grant, snippet_tokens))
+        if batch and (used + tokens > budget or len(batch) >= MAX_TRIAGE_BATCH):
+            batches.append(batch)
+            batch, used = [], 0
+        batch.append(grant)
+        used += tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _build_batch_filter_prompt(grants: list[dict], snippet_tokens: int) -> str:
+    grants_text = "\n".join(
+        _triage_line(i, g, snippet_tokens) for i, g in enumerate(grants, 1)
+    )
+
+    return f"""## Grant Opportunities
+{grants_text}"""
+
+
+def _parse_batch_filter_response(
+    text: str, grants: list[dict], stop_reason: str | None = None
+) -> list[dict]:
+    """The grants picked by a triage response.
+
+    Raises ValueError when the response cannot be trusted to refer to this
+    batch: it was cut off, or it names a grant number the batch does not
+    have. The batch's grants then stay unscored for the next run rather
+    than being rejected on a misread answer.
+    """
+    if stop_reason == "max_tokens":
+        raise ValueError(f"triage response for {len(grants)} grant(s) was truncated")
     text = text.strip()
     if text.upper() == "NONE":
         return []
 
-    numbers = re.findall(r"\d+", text)
-    seen = set()
-    candidates = []
-    for n in numbers:
-        idx = int(n) - 1
-        if 0 <= idx < len(grants) and idx not in seen:
-            seen.add(idx)
-            candidates.append(grants[idx])
-    return candidates
-
-
-def _build_prompt(grant: dict, config: Config, proposal_texts: list[str]) -> str:
-    proposals_section = ""
-    if proposal_texts:
-        condensed = []
-        for i, text in enumerate(proposal_texts, 1):
-            snippet = text[:2000]
-            condensed.append(f"--- Proposal {i} ---\n{snippet}")
-        proposals_section = (
-            "\n\n## Company Proposals (for context)\n" + "\n\n".join(condensed)
+    numbers = [int(n) for n in re.findall(r"\d+", text)]
+    out_of_range = [n for n in numbers if not 1 <= n <= len(grants)]
+    if out_of_range:
+        raise ValueError(
+            f"triage response names grant(s) {', '.join(map(str, out_of_range))} "
+            f"in a batch of {len(grants)}"
         )
+    return [grants[i - 1] for i in dict.fromkeys(numbers)]
 
-    return f"""You are evaluating whether a government grant opportunity is relevant to a company.
 
-## Company Profile
-- Name: {config.company.name}
-- Description: {config.company.description}
-- Focus Areas: {', '.join(config.company.focus_areas)}
-- Eligibility: {', '.join(config.company.eligibility)}
-{proposals_section}
+def _build_scoring_system(config: Config, proposal_texts: list[str]) -> str:
+    return f"""You are evaluating whether a government grant opportunity is relevant to a company.
 
-## Grant Opportunity
-- Title: {grant['title']}
-- Agency: {grant['agency']}
-- Description: {grant['description'] or 'N/A'}
-- Deadline: {grant['deadline'] or 'N/A'}
-- Amount: {grant['amount'] or 'N/A'}
+{_company_context(config, proposal_texts)}
 
 ## Instructions
-Score this grant's relevance to the company from 0 to 100 based on three dimensions:
+The user describes one grant opportunity. Score this grant's relevance to the company from 0 to 100 based on three dimensions:
 1. Domain relevance — does the grant target the company's industry or focus areas?
 2. Technology/capability match — does the grant fund technologies the company works with (e.g. AI, machine learning, generative AI), even if the grant is not industry-specific?
 3. Eligibility fit — does the grant target a category the company belongs to (e.g. SME, small business, startup)?
@@ -118,6 +211,15 @@ SCORE: <number>
 REASONING: <1-2 sentence explanation>"""
 
 
+def _build_prompt(grant: dict) -> str:
+    return f"""## Grant Opportunity
+- Title: {grant['title']}
+- Agency: {grant['agency']}
+- Description: {grant['description'] or 'N/A'}
+- Deadline: {grant['deadline'] or 'N/A'}
+- Amount: {grant['amount'] or 'N/A'}"""
+
+
 def _parse_response(text: str) -> tuple[int, str]:
     score = 0
     reasoning = text
@@ -136,74 +238,296 @@ def _parse_response(text: str) -> tuple[int, str]:
     return score, reasoning
 
 
-def match_grants(
-    config: Config,
-    conn: Connection,
-    on_progress: Callable[[str], None] | None = None,
-) -> int:
-    """Score unscored grants using a two-pass approach. Returns count of grants scored."""
-    if not config.anthropic_api_key:
-        raise RuntimeError("ANTHROPIC_API_KEY not set. Add it to your .env file.")
+def triage_params(batch: list[dict], system: str, config: Config) -> dict:
+    """Messages API parameters for triaging one batch of grants.
+
+    max_tokens grows with the batch so that listing every grant as
+    relevant still fits.
+    """
+    prompt = _build_batch_filter_prompt(batch, config.matcher.triage_snippet_tokens)
+    return {
+        "model": TRIAGE_MODEL,
+        "max_tokens": TRIAGE_BASE_TOKENS + TRIAGE_TOKENS_PER_GRANT * len(batch),
+        "system": _cached_system(system),
+        "messages": [{"role": "user", "content": prompt}],
+    }
+
+
+def scoring_params(grant: dict, system: str) -> dict:
+    """Messages API parameters for scoring one candidate grant."""
+    return {
+        "model": SCORING_MODEL,
+        "max_tokens": 256,
+        "system": _cached_system(system),
+        "messages": [{"role": "user", "content": _build_prompt(grant)}],
+    }
+
+
+def _triage_batch(
+    client: anthropic.Anthropic, batch: list[dict], system: str, config: Config, run: str
+) -> list[dict]:
+    def parse(message: Any) -> list[dict]:
+        return _parse_batch_filter_response(
+            message.content[0].text, batch, getattr(message, "stop_reason", None)
+        )
 
-    client = anthropic.Anthropic(api_key=config.anthropic_api_key)
-    unscored = get_unscored_grants(conn)
+    message = llm.create(
+        client, cache=True, info=CallInfo("match.triage", run), validate=parse,
+        **triage_params(batch, system, config),
+    )
+    return parse(message)
+
+
+def _score_candidate(
+    client: anthropic.Anthropic, grant: dict, system: str, run: str
+) -> tuple[int, str]:
+    message = llm.create(
+        client, cache=True, info=CallInfo("match.score", run, grant["id"]),
+        **scoring_params(grant, system),
+    )
+    return _parse_response(message.content[0].text)
 
-    if not unscored:
-        return 0
 
-    proposals = get_proposals(conn)
-    proposal_texts = [p["text"] for p in proposals]
+def make_client(config: Config) -> anthropic.Anthropic:
+    return llm.get_client(config.anthropic_api_key)
 
-    # --- Pass 1: Batch triage with Haiku ---
-    num_batches = math.ceil(len(unscored) / BATCH_SIZE)
+
+def _prefilter(
+    config: Config,
+    conn: Connection,
+    grants: list[dict],
+    proposal_texts: list[str],
+    fingerprint: str,
+    on_progress: Callable[[str], None] | None,
+) -> tuple[list[dict], int]:
+    """Reject clearly irrelevant grants without an LLM call. Returns (kept, rejected)."""
+    threshold = config.matcher.prefilter_threshold
+    if threshold <= 0 or not grants:
+        return grants, 0
+
+    relevance = score_grants(corpus(conn), config, proposal_texts)
+    rejected = [g for g in grants if relevance[g["id"]] < threshold]
+    update_scores(conn, [
+        (g["id"], 0, REJECT_REASON.format(score=relevance[g["id"]], threshold=threshold))
+        for g in rejected
+    ], fingerprint)
+    kept = [g for g in grants if relevance[g["id"]] >= threshold]
     if on_progress:
+        saved = len(pack_triage_batches(grants, config)) - len(pack_triage_batches(kept, config))
         on_progress(
-            f"Pass 1: Filtering {len(unscored)} grants in {num_batches} batch(es)..."
+            f"Pre-filter: rejected {len(rejected)} grant(s) locally, "
+            f"saving {saved} Haiku call(s)."
         )
+    return kept, len(rejected)
 
-    candidates = []
-    for i in range(0, len(unscored), BATCH_SIZE):
-        batch = unscored[i : i + BATCH_SIZE]
-        prompt = _build_batch_filter_prompt(batch, config, proposal_texts)
 
-        message = client.messages.create(
-            model="claude-haiku-4-5-20251001",
-            max_tokens=256,
-            messages=[{"role": "user", "content": prompt}],
+def prepare_unscored(
+    config: Config,
+    conn: Connection,
+    proposal_texts: list[str],
+    on_progress: Callable[[str], None] | None = None,
+    fingerprint: str | None = None,
+) -> tuple[list[dict], int]:
+    """Resolve what can be scored without the LLM and return what is left.
+
+    Duplicates take their canonical grant's score and the local pre-filter
+    rejects clearly irrelevant grants. Grants already submitted in an open
+    Message Batch are left out. Returns the grants still to be sent to the
+    LLM and how many were scored locally.
+    """
+    # Cross-source duplicates share their canonical grant's score, so only
+    # canonical grants are sent to the LLM
+    duplicates = assign_duplicates(conn)
+    copied = copy_duplicate_scores(conn)
+    pending = get_pending_batch_grant_ids(conn)
+    all_unscored = [g for g in get_unscored_grants(conn) if g["id"] not in pending]
+    unscored = [g for g in all_unscored if g["duplicate_of"] is None]
+    if on_progress and duplicates:
+        on_progress(
+            f"Found {duplicates} cross-source duplicate(s); "
+            f"scoring {len(unscored)} of {len(all_unscored) + copied} unscored grant(s)."
         )
+    if on_progress and pending:
+        on_progress(f"Skipping {len(pending)} grant(s) awaiting Message Batch results.")
 
-        response_text = message.content[0].text
-        batch_candidates = _parse_batch_filter_response(response_text, batch)
-        candidates.extend(batch_candidates)
+    if fingerprint is None:
+        fingerprint = profile_fingerprint(config, proposal_texts)
+    unscored, prefiltered = _prefilter(
+        config, conn, unscored, proposal_texts, fingerprint, on_progress
+    )
+    return unscored, copied + prefiltered
 
-        # Mark filtered-out grants with score=0
-        candidate_ids = {g["id"] for g in batch_candidates}
-        for grant in batch:
-            if grant["id"] not in candidate_ids:
-                update_score(conn, grant["id"], 0, "Filtered out in batch triage.")
 
+def prepare_stale(
+    config: Config,
+    conn: Connection,
+    proposal_texts: list[str],
+    fingerprint: str,
+    budget: int | None = None,
+    on_progress: Callable[[str], None] | None = None,
+) -> tuple[list[dict], int]:
+    """Pick grants whose score came from a different profile, up to `budget`.
+
+    Open grants with the highest old scores go first (see
+    `db.get_stale_grants`); their old scores stay in place until new ones
+    arrive. Returns the grants to send to the LLM and how many the
+    pre-filter resolved locally.
+    """
+    assign_duplicates(conn)
+    pending = get_pending_batch_grant_ids(conn)
+    stale = [g for g in get_stale_grants(conn, fingerprint) if g["id"] not in pending]
+    selected = stale[:budget] if budget else stale
     if on_progress:
-        on_progress(f"Pass 1 complete: {len(candidates)} candidate(s) identified.")
+        on_progress(
+            f"Found {len(stale)} open grant(s) scored against an older profile; "
+            f"re-scoring {len(selected)}"
+            + (f" (budget {budget})." if budget and len(stale) > budget else ".")
+        )
+    return _prefilter(config, conn, selected, proposal_texts, fingerprint, on_progress)
+
+
+def match_grants(
+    config: Config,
+    conn: Connection,
+    on_progress: Callable[[str], None] | None = None,
+    client: anthropic.Anthropic | None = None,
+    rescore_stale: bool = False,
+    budget: int | None = None,
+) -> int:
+    """Score unscored grants using a two-pass approach. Returns count of grants scored.
+
+    Progress is tracked per grant in `match_jobs`, committed together with
+    each result: an interrupted run keeps everything scored so far, and
+    grants that passed triage but were never scored go straight to Pass 2
+    on the next run. With `rescore_stale`, grants scored
+    against a different company profile or proposal set are re-scored
+    instead, at most `budget` of them. Pass `client` to use something other
+    than a real Anthropic client, such as the test suite's `FakeAnthropic`.
+    """
+    if client is None:
+        client = make_client(config)
+    if not rescore_stale and not get_unscored_grants(conn):
+        return 0
+    started_at = datetime.now(timezone.utc)
+    # The suffix keeps runs started within the same second apart in llm_calls
+    run = f"match {started_at:%Y-%m-%d %H:%M:%S} {uuid.uuid4().hex[:6]}"
+
+    proposal_texts = [p["text"] for p in get_proposals(conn)]
+    fingerprint = profile_fingerprint(config, proposal_texts)
+    if rescore_stale:
+        unscored, resolved = prepare_stale(
+            config, conn, proposal_texts, fingerprint, budget, on_progress
+        )
+    else:
+        unscored, resolved = prepare_unscored(
+            config, conn, proposal_texts, on_progress, fingerprint
+        )
 
-    # --- Pass 2: Individual scoring with Sonnet ---
-    if candidates and on_progress:
-        on_progress(f"Pass 2: Scoring {len(candidates)} candidate(s) individually...")
+    if not unscored:
+        if on_progress and resolved:
+            on_progress(f"Done. Scored {resolved} grant(s).")
+        return resolved
+
+    # Pass 1 (Haiku batch triage) and Pass 2 (Sonnet scoring of each
+    # candidate) run as one pipeline on a bounded pool: candidates from a
+    # finished triage batch are queued, and whenever a slot frees up the
+    # queue is drained before the next batch is triaged. Results come back
+    # to this thread, which is the only one that writes to the DB.
+    max_in_flight = max(1, config.matcher.max_in_flight)
+    resumable = get_match_candidates(conn, fingerprint)
+    queue: deque[dict] = deque(g for g in unscored if g["id"] in resumable)
+    to_triage = [g for g in unscored if g["id"] not in resumable]
+    queue_match_jobs(conn, [g["id"] for g in to_triage], fingerprint)
+    batches = deque(pack_triage_batches(to_triage, config))
+    if on_progress:
+        if queue:
+            on_progress(f"Resuming {len(queue)} candidate(s) left unscored by an earlier run.")
+        on_progress(
+            f"Triaging {len(to_triage)} grants in {len(batches)} batch(es) and scoring "
+            f"candidates as they arrive, {max_in_flight} request(s) at a time..."
+        )
 
-    for grant in candidates:
-        prompt = _build_prompt(grant, config, proposal_texts)
+    triage_system = _build_batch_filter_system(config, proposal_texts)
+    scoring_system = _build_scoring_system(config, proposal_texts)
+    # A cached prefix is only readable once the request that wrote it has
+    # finished, so each stage sends a single request before fanning out
+    warmed: set[str] = set()
+
+    def can_submit(stage: str) -> bool:
+        return stage in warmed or all(s != stage for s, _ in in_flight.values())
+
+    in_flight: dict[Future, tuple[str, Any]] = {}
+    candidates, triaged, scored, failures = len(queue), 0, 0, 0
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="match") as pool:
+        while batches or queue or in_flight:
+            while len(in_flight) < max_in_flight:
+                if queue and can_submit("score"):
+                    grant = queue.popleft()
+                    future = pool.submit(_score_candidate, client, grant, scoring_system, run)
+                    in_flight[future] = ("score", grant)
+                elif batches and can_submit("triage"):
+                    batch = batches.popleft()
+                    future = pool.submit(
+                        _triage_batch, client, batch, triage_system, config, run
+                    )
+                    in_flight[future] = ("triage", batch)
+                else:
+                    break
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, item = in_flight.pop(future)
+                warmed.add(stage)
+                try:
+                    result = future.result()
+                except (anthropic.APIError, ValueError) as e:
+                    failures += 1
+                    grant_ids = [g["id"] for g in item] if stage == "triage" else [item["id"]]
+                    record_match_failure(conn, grant_ids, f"{type(e).__name__}: {e}")
+                    if on_progress:
+                        what = "Triage batch" if stage == "triage" else f"Scoring {item['title']!r}"
+                        on_progress(f"{what} failed, will retry next run: {e}")
+                    continue
+
+                if stage == "triage":
+                    # Mark filtered-out grants with score=0
+                    candidate_ids = {g["id"] for g in result}
+                    record_triage(conn, [
+                        (g["id"], 0, TRIAGE_REJECT_REASON)
+                        for g in item if g["id"] not in candidate_ids
+                    ], list(candidate_ids), fingerprint)
+                    queue.extend(result)
+                    candidates += len(result)
+                    triaged += len(item) - len(result)
+                else:
+                    score, reasoning = result
+                    update_score(conn, item["id"], score, reasoning, fingerprint)
+                    scored += 1
+                    if on_progress:
+                        on_progress(f"  [{score:>3}] {(item['title'] or '')[:80]}")
 
-        message = client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=256,
-            messages=[{"role": "user", "content": prompt}],
+    if on_progress:
+        on_progress(
+            f"Triage rejected {triaged} grant(s); {scored} of {candidates} candidate(s) scored."
         )
 
-        response_text = message.content[0].text
-        score, reasoning = _parse_response(response_text)
-        update_score(conn, grant["id"], score, reasoning)
+    resolved += copy_duplicate_scores(conn)
+    # Usage comes from the llm_calls telemetry; responses replayed from the
+    # response cache were never sent, so they are not counted
+    totals = rollup(conn, "run", run=run)
+    if on_progress and totals and totals[0].calls > totals[0].errors:
+        t = totals[0]
+        on_progress(
+            f"Prompt cache: {t.cache_hits}/{t.calls - t.errors} request(s) hit, "
+            f"{t.cache_read_tokens} token(s) read from cache, "
+            f"{t.cache_write_tokens} written, {t.input_tokens} uncached input."
+        )
 
-    total_scored = len(unscored)
+    total_scored = resolved + triaged + scored
     if on_progress:
-        on_progress(f"Done. Scored {total_scored} grant(s).")
+        message = f"Done. Scored {total_scored} grant(s)."
+        if failures:
+            message += f" {failures} request(s) failed; those grants stay unscored."
+        on_progress(message)
 
     return total_scored
@@ -0,0 +1,154 @@
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from sqlite3 import Connection
+
+import numpy as np
+
+from grant_researcher.config import Config
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# How much each part of the company profile counts towards a term's weight
+FOCUS_AREA_WEIGHT = 3.0
+PROFILE_WEIGHT = 2.0
+PROPOSAL_WEIGHT = 1.0
+
+# Only this much of a grant description is scored
+DESCRIPTION_CHARS = 3000
+
+REJECT_REASON = "Filtered out by local pre-filter (relevance {score:.3f} < {threshold:g})."
+TRIAGE_REJECT_REASON = "Filtered out in batch triage."
+
+_STOPWORDS = frozenset("""
+    a about above after all also an and any are as at be been being between both
+    but by can could do does for from had has have how i if in into is it its
+    may more most must no not of on or other our out over per shall should so
+    such than that the their them then there these they this those through to
+    under up upon us use used using via was we were what when where which while
+    who will with within would you your
+""".split())
+
+
+def _tokens(text: str) -> list[str]:
+    """Lowercased words and adjacent-word bigrams, without stopwords."""
+    words = [
+        w for w in re.findall(r"[a-z0-9]+", text.lower())
+        if len(w) > 1 and w not in _STOPWORDS
+    ]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def _profile_weights(config: Config, proposal_texts: list[str]) -> dict[str, float]:
+    """Weight each profile term by where it appears, normalized to sum to 1."""
+    sections = [
+        (FOCUS_AREA_WEIGHT, " . ".join(config.company.focus_areas)),
+        (PROFILE_WEIGHT, config.company.description),
+        (PROFILE_WEIGHT, " . ".join(config.search.keywords)),
+        *((PROPOSAL_WEIGHT, text) for text in proposal_texts),
+    ]
+    weights: Counter[str] = Counter()
+    for section_weight, text in sections:
+        for term, tf in Counter(_tokens(text or "")).items():
+            weights[term] += section_weight * (1 + math.log(tf))
+    total = sum(weights.values())
+    return {term: w / total for term, w in weights.items()} if total else {}
+
+
+def score_grants(
+    grants: list[dict], config: Config, proposal_texts: list[str]
+) -> dict[int, float]:
+    """BM25 relevance of each grant's title and description to the company profile.
+
+    The profile (focus areas, description, search keywords and proposals)
+    acts as one weighted query. Only profile terms are kept from each grant,
+    as sparse (grant, term, count) triples. BM25 contributions are then
+    computed for all of them at once and summed per grant with bincount.
+    Document frequencies and average length come from `grants` itself, so
+    pass the whole table when scores must be comparable across runs.
+    """
+    weights = _profile_weights(config, proposal_texts)
+    if not grants or not weights:
+        return {g["id"]: 0.0 for g in grants}
+
+    vocab = {term: i for i, term in enumerate(weights)}
+    query_weight = np.fromiter(weights.values(), dtype=np.float64, count=len(weights))
+
+    doc_idx, term_idx, counts = [], [], []
+    lengths = np.empty(len(grants), dtype=np.float64)
+    for d, grant in enumerate(grants):
+        tokens = _tokens(f"{grant['title'] or ''} {(grant['description'] or '')[:DESCRIPTION_CHARS]}")
+        lengths[d] = len(tokens)
+        for term, tf in Counter(tokens).items():
+            t = vocab.get(term)
+            if t is not None:
+                doc_idx.append(d)
+                term_idx.append(t)
+                counts.append(tf)
+
+    doc_idx = np.asarray(doc_idx, dtype=np.int64)
+    term_idx = np.asarray(term_idx, dtype=np.int64)
+    tf = np.asarray(counts, dtype=np.float64)
+
+    n = len(grants)
+    df = np.bincount(term_idx, minlength=len(vocab))
+    idf = np.log1p((n - df + 0.5) / (df + 0.5))
+    avgdl = max(lengths.mean(), 1.0)
+
+    norm = K1 * (1 - B + B * lengths[doc_idx] / avgdl)
+    contrib = query_weight[term_idx] * idf[term_idx] * tf * (K1 + 1) / (tf + norm)
+    scores = np.bincount(doc_idx, weights=contrib, minlength=n)
+    return {g["id"]: float(s) for g, s in zip(grants, scores)}
+
+
+def corpus(conn: Connection) -> list[dict]:
+    """All stored grants, the document collection the pre-filter scores against."""
+    rows = conn.execute("SELECT id, title, description FROM grants").fetchall()
+    return [dict(r) for r in rows]
+
+
+@dataclass
+class ThresholdResult:
+    threshold: float
+    rejected: int  # grants the pre-filter would reject
+    agreed: int  # ... that Haiku also rejected
+    lost: int  # ... that Haiku passed on to Pass 2
+
+
+def evaluate(
+    conn: Connection, config: Config, proposal_texts: list[str], steps: int = 10
+) -> tuple[int, int, list[ThresholdResult]]:
+    """Compare pre-filter decisions with past Haiku triage decisions.
+
+    Returns (haiku_rejected, haiku_passed, results), where results cover
+    thresholds at evenly spaced quantiles of the scores of triaged grants.
+    A good threshold rejects many grants while losing few that Haiku passed.
+    """
+    scores = score_grants(corpus(conn), config, proposal_texts)
+    rows = conn.execute(
+        """
+        SELECT id, score_reasoning FROM grants
+        WHERE score IS NOT NULL
+          AND score_reasoning NOT LIKE 'Filtered out by local pre-filter%'
+          AND score_reasoning NOT LIKE 'Duplicate of #%'
+        """
+    ).fetchall()
+    triaged = [(scores[r["id"]], r["score_reasoning"] != TRIAGE_REJECT_REASON) for r in rows]
+    if not triaged:
+        return 0, 0, []
+
+    values = np.array([s for s, _ in triaged])
+    passed = np.array([p for _, p in triaged])
+    results = []
+    for threshold in np.unique(np.quantile(values, np.linspace(0, 0.9, steps))):
+        below = values < threshold
+        results.append(ThresholdResult(
+            threshold=float(threshold),
+            rejected=int(below.sum()),
+            agreed=int((below & ~passed).sum()),
+            lost=int((below & passed).sum()),
+        ))
+    return int((~passed).sum()), int(passed.sum()), results
@@ -1,10 +1,28 @@
 import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
 from pathlib import Path
 from sqlite3 import Connection
+from typing import Callable
 
 import pymupdf
 
-from grant_researcher.db import get_proposals, upsert_proposal
+from grant_researcher.db import get_proposals, upsert_proposals
+
+# Extracted proposals written per transaction
+COMMIT_EVERY = 10
+
+
+@dataclass
+class ProposalResult:
+    name: str
+    file_hash: str = ""
+    text: str | None = None  # None when unchanged or extraction failed
+    elapsed: float = 0.0
+    error: str | None = None
 
 
 def _file_hash(path: Path) -> str:
@@ -36,46 +54,96 @@ def _extract_folder_text(pdf_paths: list[Path]) -> str:
     return "\n\n".join(parts)
 
 
-def ingest_proposals(proposals_dir: Path, conn: Connection) -> list[str]:
+def _process_entry(
+    name: str, pdf_paths: list[Path], folder: bool, known_hash: str | None
+) -> ProposalResult:
+    """Hash one proposal and extract its text unless the hash is `known_hash`.
+
+    Runs in a worker process; errors come back in the result rather than
+    raised, so one corrupt PDF only fails its own proposal.
+    """
+    start = time.monotonic()
+    try:
+        if folder:
+            fhash = _folder_hash(pdf_paths)
+            text = None if fhash == known_hash else _extract_folder_text(pdf_paths)
+        else:
+            fhash = _file_hash(pdf_paths[0])
+            text = None if fhash == known_hash else _extract_text(pdf_paths[0])
+    except Exception as e:
+        return ProposalResult(
+            name, elapsed=time.monotonic() - start, error=f"{type(e).__name__}: {e}"
+        )
+    return ProposalResult(name, fhash, text, time.monotonic() - start)
+
+
+def _scan(proposals_dir: Path) -> list[tuple[str, list[Path], bool]]:
+    """(name, PDFs, is folder) for each top-level PDF, then each subfolder holding PDFs."""
+    entries = [(p.name, [p], False) for p in sorted(proposals_dir.glob("*.pdf"))]
+    for subdir in sorted(proposals_dir.iterdir()):
+        if not subdir.is_dir():
+            continue
+        pdf_paths = sorted(subdir.glob("*.pdf"))
+        if pdf_paths:
+            entries.append((subdir.name, pdf_paths, True))
+    return entries
+
+
+def ingest_proposals(
+    proposals_dir: Path,
+    conn: Connection,
+    max_workers: int = 0,
+    commit_every: int = COMMIT_EVERY,
+    on_result: Callable[[ProposalResult], None] | None = None,
+) -> list[str]:
     """Scan proposals/ for PDFs and subfolders, extract text, and cache in DB.
 
     Top-level PDFs are ingested individually. Subdirectories containing PDFs
     are ingested as a single proposal entry (folder name as filename,
     concatenated text from all PDFs inside).
 
+    Hashing and extraction run on a pool of `max_workers` processes (0 means
+    one per CPU). This thread is the only writer: results are saved as they
+    complete, `commit_every` per transaction, so a slow PDF holds up nothing
+    but itself. A proposal that fails to extract is reported to `on_result`
+    with its error and left for the next run; `on_result` also gets each
+    changed proposal with its extraction time.
+
     Returns list of filenames that were ingested (new or updated).
     """
     existing = {p["filename"]: p["file_hash"] for p in get_proposals(conn)}
-    ingested = []
-
-    # Top-level PDFs
-    for pdf_path in sorted(proposals_dir.glob("*.pdf")):
-        filename = pdf_path.name
-        fhash = _file_hash(pdf_path)
+    entries = _scan(proposals_dir)
+    if not entries:
+        return []
 
-        if existing.get(filename) == fhash:
-            continue
-
-        text = _extract_text(pdf_path)
-        upsert_proposal(conn, filename, text, fhash)
-        ingested.append(filename)
-
-    # Subdirectories (multi-part proposals)
-    for subdir in sorted(proposals_dir.iterdir()):
-        if not subdir.is_dir():
-            continue
-        pdf_paths = sorted(subdir.glob("*.pdf"))
-        if not pdf_paths:
-            continue
-
-        folder_name = subdir.name
-        fhash = _folder_hash(pdf_paths)
-
-        if existing.get(folder_name) == fhash:
-            continue
-
-        text = _extract_folder_text(pdf_paths)
-        upsert_proposal(conn, folder_name, text, fhash)
-        ingested.append(folder_name)
+    ingested = []
+    pending: list[tuple[str, str, str]] = []
+
+    def flush() -> None:
+        upsert_proposals(conn, pending)
+        ingested.extend(name for name, _, _ in pending)
+        pending.clear()
+
+    workers = min(max_workers or os.cpu_count() or 1, len(entries))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(_process_entry, name, paths, folder, existing.get(name)): name
+            for name, paths, folder in entries
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except BrokenProcessPool as e:
+                # A worker died (e.g. the PDF library crashed); every
+                # proposal still running or queued fails with it
+                result = ProposalResult(futures[future], error=f"worker process died: {e}")
+            if result.text is not None:
+                pending.append((result.name, result.text, result.file_hash))
+                if len(pending) >= commit_every:
+                    flush()
+            if on_result and (result.text is not None or result.error):
+                on_result(result)
+    if pending:
+        flush()
 
     return ingested
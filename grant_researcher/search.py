@@ -0,0 +1,84 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable
+
+from grant_researcher.db import GrantWriter, set_source_watermark
+
+# How often the writer thread checks whether the grant buffer needs flushing
+WRITER_POLL_INTERVAL = 0.5
+
+
+@dataclass
+class SourceTask:
+    label: str
+    run: Callable[[GrantWriter], int]
+    # Set for sources that search incrementally; their watermark is advanced
+    # after a successful run that was not cut short
+    state_key: str | None = None
+
+
+@dataclass
+class SourceResult:
+    label: str
+    count: int = 0
+    elapsed: float = 0.0
+    error: Exception | None = None
+    state_key: str | None = None
+
+
+def _run_task(task: SourceTask, writer: GrantWriter) -> SourceResult:
+    start = time.monotonic()
+    try:
+        count = task.run(writer)
+    except Exception as e:
+        return SourceResult(
+            task.label, elapsed=time.monotonic() - start, error=e, state_key=task.state_key
+        )
+    return SourceResult(
+        task.label, count=count, elapsed=time.monotonic() - start, state_key=task.state_key
+    )
+
+
+def run_sources(
+    tasks: list[SourceTask],
+    writer: GrantWriter,
+    max_workers: int,
+    on_result: Callable[[SourceResult], None] | None = None,
+) -> list[SourceResult]:
+    """Run source searches concurrently, writing their grants from this thread.
+
+    Each source runs in its own worker thread; a failure in one source is
+    captured in its SourceResult and does not affect the others. All DB
+    writes happen here, through `writer`, so the connection never leaves
+    the calling thread: the buffer is flushed whenever it fills up and once
+    more after the last source finishes. Once everything is written, each
+    incremental source that succeeded gets its watermark moved to the time
+    this run started, unless it marked itself truncated on the writer: its
+    watermark then stays put so the next run asks for the missed notices
+    again. Returns results in completion order.
+    """
+    started_at = datetime.now(timezone.utc)
+    results = []
+    with ThreadPoolExecutor(
+        max_workers=max(1, max_workers), thread_name_prefix="source"
+    ) as pool:
+        pending = {pool.submit(_run_task, task, writer) for task in tasks}
+        while pending:
+            done, pending = wait(
+                pending, timeout=WRITER_POLL_INTERVAL, return_when=FIRST_COMPLETED
+            )
+            if writer.is_full():
+                writer.flush()
+            for future in done:
+                result = future.result()
+                results.append(result)
+                if on_result:
+                    on_result(result)
+
+    writer.flush()
+    for result in results:
+        if result.state_key and not result.error and result.state_key not in writer.truncated:
+            set_source_watermark(writer.conn, result.state_key, started_at, result.count)
+    return results
@@ -1,15 +1,13 @@
 import json
 import re
-import warnings
+import xml.etree.ElementTree as ET
 from datetime import datetime, timezone
-from sqlite3 import Connection
+from typing import Iterable, Iterator
 
 import httpx
-from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
 
-warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
-
-from grant_researcher.db import upsert_grant
+from grant_researcher.db import GrantWriter
+from grant_researcher.sources import http, rss
 
 RSS_URL = "https://ec.europa.eu/info/funding-tenders/opportunities/data/referenceData/grantTenders-rss.xml"
 
@@ -27,63 +25,43 @@ KEYWORDS = [
 ]
 
 
-def _fetch_rss(client: httpx.Client) -> str:
-    resp = client.get(RSS_URL, headers={"Accept": "application/rss+xml,text/xml"})
-    resp.raise_for_status()
-    return resp.text
-
-
-def _parse_rss(xml_text: str) -> list[dict]:
-    """Parse RSS XML and return list of call dicts."""
-    soup = BeautifulSoup(xml_text, "html.parser")
-    calls = []
-
-    for item in soup.find_all("item"):
-        title_tag = item.find("title")
-        link_tag = item.find("link")
-        desc_tag = item.find("description")
-        pub_tag = item.find("pubdate")
-
-        if not link_tag:
-            continue
-
-        url = link_tag.text.strip() if link_tag.string else ""
-        # Handle BeautifulSoup's link tag behavior — sometimes the URL is
-        # the next sibling text node rather than inside the tag
-        if not url:
-            next_sib = link_tag.next_sibling
-            if next_sib and isinstance(next_sib, str):
-                url = next_sib.strip()
+def _parse_item(item: dict[str, str]) -> dict | None:
+    """Turn one RSS item into a call dict, or None if it has no usable link."""
+    url = item.get("link", "")
+    if not url:
+        return None
 
-        if not url:
-            continue
+    # Extract call identifier from URL — typically in callCode= param
+    # e.g. ...;callCode=RENEWFM-2025-INVEST-MULTI
+    call_id_match = re.search(r"callCode=([A-Za-z0-9_-]+)", url)
+    call_id = call_id_match.group(1) if call_id_match else url.split("/")[-1]
 
-        # Extract call identifier from URL — typically in callCode= param
-        # e.g. ...;callCode=RENEWFM-2025-INVEST-MULTI
-        call_id_match = re.search(r"callCode=([A-Za-z0-9_-]+)", url)
-        call_id = call_id_match.group(1) if call_id_match else url.split("/")[-1]
+    description = item.get("description", "")
 
-        title = title_tag.text.strip() if title_tag else ""
-        description = desc_tag.text.strip() if desc_tag else ""
+    # Extract real deadline from description HTML
+    # Format: <b>Deadline</b>: Thu, 26 Sep 2024 17:00:00 (Brussels local time)
+    deadline = ""
+    deadline_match = re.search(
+        r"Deadline</b>:\s*(\w+,\s+\d+\s+\w+\s+\d{4}\s+[\d:]+)", description
+    )
+    if deadline_match:
+        deadline = deadline_match.group(1)
 
-        # Extract real deadline from description HTML
-        # Format: <b>Deadline</b>: Thu, 26 Sep 2024 17:00:00 (Brussels local time)
-        deadline = ""
-        deadline_match = re.search(
-            r"Deadline</b>:\s*(\w+,\s+\d+\s+\w+\s+\d{4}\s+[\d:]+)", description
-        )
-        if deadline_match:
-            deadline = deadline_match.group(1)
+    return {
+        "call_id": call_id,
+        "title": item.get("title", ""),
+        "description": description,
+        "url": url,
+        "deadline": deadline,
+    }
 
-        calls.append({
-            "call_id": call_id,
-            "title": title,
-            "description": description,
-            "url": url,
-            "deadline": deadline,
-        })
 
-    return calls
+def _iter_calls(chunks: Iterable[bytes]) -> Iterator[dict]:
+    """Stream call dicts out of the RSS feed, one item at a time."""
+    for item in rss.iter_items(chunks):
+        call = _parse_item(item)
+        if call:
+            yield call
 
 
 def _is_relevant(title: str, description: str) -> bool:
@@ -119,32 +97,38 @@ def _normalize(record: dict) -> dict:
     }
 
 
-def search_grants(keywords: list[str], conn: Connection) -> int:
-    """Fetch EU Funding & Tenders RSS feed, filter for relevance, upsert results.
+def search_grants(keywords: list[str], writer: GrantWriter) -> int:
+    """Stream the EU Funding & Tenders RSS feed, filter for relevance, upsert results.
 
     The `keywords` arg from config is ignored — we filter locally using
     KEYWORDS (aviation + AI + SME) since the RSS feed returns all recent calls.
+    Items are filtered and handed to the writer as they are parsed, so the
+    feed is never held in memory as a whole.
     """
     total = 0
 
     try:
-        with httpx.Client(timeout=30, follow_redirects=True) as client:
-            xml_text = _fetch_rss(client)
-    except httpx.HTTPError:
-        return 0
-
-    for call in _parse_rss(xml_text):
-        if not call.get("call_id"):
-            continue
-
-        if not _is_deadline_future(call.get("deadline", "")):
-            continue
-
-        if not _is_relevant(call.get("title", ""), call.get("description", "")):
-            continue
-
-        grant = _normalize(call)
-        upsert_grant(conn, grant)
-        total += 1
+        with http.conditional_stream(
+            http.get_client(), RSS_URL, headers={"Accept": "application/rss+xml,text/xml"}
+        ) as resp:
+            if http.is_not_modified(resp):
+                return 0
+            resp.raise_for_status()
+
+            for call in _iter_calls(resp.iter_bytes()):
+                if not call.get("call_id"):
+                    continue
+
+                if not _is_deadline_future(call.get("deadline", "")):
+                    continue
+
+                if not _is_relevant(call.get("title", ""), call.get("description", "")):
+                    continue
+
+                grant = _normalize(call)
+                writer.upsert(grant)
+                total += 1
+    except (httpx.HTTPError, ET.ParseError):
+        return total
 
     return total
@@ -0,0 +1,32 @@
+import asyncio
+from typing import Awaitable, Callable, Iterable, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+async def fan_out(
+    items: Iterable[T],
+    worker: Callable[[T], Awaitable[R]],
+    concurrency: int,
+) -> list[R]:
+    """Run `worker` over `items` with at most `concurrency` calls in flight.
+
+    Results are returned in input order. If any call raises, the remaining
+    calls are cancelled and the first exception propagates, so a failing
+    source still fails as a whole.
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def bounded(item: T) -> R:
+        async with semaphore:
+            return await worker(item)
+
+    tasks = [asyncio.ensure_future(bounded(item)) for item in items]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
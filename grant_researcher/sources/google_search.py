@@ -1,13 +1,18 @@
+import asyncio
 import json
-from sqlite3 import Connection
 from urllib.parse import urlparse
 
 import httpx
 
-from grant_researcher.db import upsert_grant
+from grant_researcher.db import GrantWriter
+from grant_researcher.sources import http
+from grant_researcher.sources.fanout import fan_out
 
 SEARCH_URL = "https://www.googleapis.com/customsearch/v1"
 
+# Keyword queries in flight at once
+DEFAULT_CONCURRENCY = 4
+
 
 def _normalize(result: dict) -> dict:
     link = result.get("link", "")
@@ -26,28 +31,54 @@ def _normalize(result: dict) -> dict:
     }
 
 
-def search_grants(
-    keywords: list[str], conn: Connection, api_key: str, cse_id: str
+async def _search_keyword(
+    client: httpx.AsyncClient, keyword: str, writer: GrantWriter, api_key: str, cse_id: str
 ) -> int:
-    """Search Google Custom Search for each keyword, upsert results. Returns count of grants stored."""
-    total = 0
-    with httpx.Client(timeout=30) as client:
-        for keyword in keywords:
-            query = f"{keyword} grant funding opportunity"
-            params = {
-                "q": query,
-                "key": api_key,
-                "cx": cse_id,
-                "num": 10,
-            }
-            resp = client.get(SEARCH_URL, params=params)
-            resp.raise_for_status()
-            data = resp.json()
-
-            for item in data.get("items", []):
-                grant = _normalize(item)
-                if grant["external_id"]:
-                    upsert_grant(conn, grant)
-                    total += 1
+    query = f"{keyword} grant funding opportunity"
+    params = {
+        "q": query,
+        "key": api_key,
+        "cx": cse_id,
+        "num": 10,
+    }
+    async with http.aconditional_get(client, SEARCH_URL, params=params) as resp:
+        if http.is_not_modified(resp):
+            return 0
+        resp.raise_for_status()
+        data = resp.json()
 
+        total = 0
+        for item in data.get("items", []):
+            grant = _normalize(item)
+            if grant["external_id"]:
+                writer.upsert(grant)
+                total += 1
     return total
+
+
+async def search_grants_async(
+    keywords: list[str],
+    writer: GrantWriter,
+    api_key: str,
+    cse_id: str,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> int:
+    """Search Google Custom Search for all keywords concurrently. Returns count of grants stored."""
+    async with http.async_client() as client:
+        counts = await fan_out(
+            keywords,
+            lambda kw: _search_keyword(client, kw, writer, api_key, cse_id),
+            concurrency,
+        )
+    return sum(counts)
+
+
+def search_grants(
+    keywords: list[str],
+    writer: GrantWriter,
+    api_key: str,
+    cse_id: str,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> int:
+    """Search Google Custom Search for each keyword, upsert results. Returns count of grants stored."""
+    return asyncio.run(search_grants_async(keywords, writer, api_key, cse_id, concurrency))
@@ -1,14 +1,19 @@
 import json
-from sqlite3 import Connection
 
 import httpx
 
-from grant_researcher.db import upsert_grant
+from grant_researcher.db import GrantWriter
+from grant_researcher.sources import http
+from grant_researcher.sources.paging import DEFAULT_MAX_PAGES, Page, search_all
 
 SEARCH_URL = "https://api.grants.gov/v1/api/search2"
 
+# Requests in flight at once, across keywords and pages
+DEFAULT_CONCURRENCY = 4
+PAGE_SIZE = 50
 
-def _build_payload(keyword: str, page: int = 0, rows: int = 50) -> dict:
+
+def _build_payload(keyword: str, page: int = 0, rows: int = PAGE_SIZE) -> dict:
     return {
         "keyword": keyword,
         "oppStatuses": "forecasted|posted",
@@ -32,20 +37,21 @@ def _normalize(opp: dict) -> dict:
     }
 
 
-def search_grants(keywords: list[str], conn: Connection) -> int:
+async def _fetch_page(client: httpx.AsyncClient, keyword: str, page: int) -> Page:
+    resp = await http.arequest(client, "POST", SEARCH_URL, json=_build_payload(keyword, page))
+    resp.raise_for_status()
+    data = resp.json().get("data", {})
+    return Page(data.get("oppHits", []), data.get("hitCount"))
+
+
+def search_grants(
+    keywords: list[str],
+    writer: GrantWriter,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    max_pages: int = DEFAULT_MAX_PAGES,
+) -> int:
     """Search Grants.gov for each keyword, upsert results. Returns count of grants stored."""
-    total = 0
-    with httpx.Client(timeout=30) as client:
-        for keyword in keywords:
-            payload = _build_payload(keyword)
-            resp = client.post(SEARCH_URL, json=payload)
-            resp.raise_for_status()
-            data = resp.json()
-
-            opportunities = data.get("data", {}).get("oppHits", [])
-            for opp in opportunities:
-                grant = _normalize(opp)
-                upsert_grant(conn, grant)
-                total += 1
-
-    return total
+    return search_all(
+        keywords, writer, _fetch_page, _normalize, PAGE_SIZE, concurrency, max_pages,
+        source="grants.gov", label="Grants.gov",
+    )
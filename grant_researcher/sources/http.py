@@ -0,0 +1,259 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import AsyncIterator, Iterator
+
+import httpx
+
+from grant_researcher.sources import ratelimit
+
+TIMEOUT = 30
+HEADERS = {"Accept-Encoding": "gzip, deflate"}
+LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60)
+
+# Retries after the server pushes back with 429 (or 503 + Retry-After)
+MAX_RETRIES = 4
+# Backoff for a 429 without Retry-After: 2, 4, 8, 16s
+BACKOFF_BASE = 2.0
+
+# Validators not confirmed by a response for this long are pruned
+VALIDATOR_MAX_AGE = 30 * 24 * 3600
+
+_cache_dir: Path | None = None
+# Validators from responses the caller finished with, saved by save_validators()
+_staged: dict[Path, dict | None] = {}
+_staged_lock = threading.Lock()
+_client: httpx.Client | None = None
+_client_lock = threading.Lock()
+
+
+def configure(cache_dir: Path | None) -> None:
+    """Set the directory for cached validators. None disables conditional requests."""
+    global _cache_dir
+    _cache_dir = cache_dir
+    with _staged_lock:
+        _staged.clear()
+    if cache_dir is not None:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+
+def get_client() -> httpx.Client:
+    """Return the process-wide sync client, shared by all sources and threads."""
+    global _client
+    with _client_lock:
+        if _client is None or _client.is_closed:
+            _client = httpx.Client(
+                timeout=TIMEOUT, headers=HEADERS, limits=LIMITS, follow_redirects=True
+            )
+        return _client
+
+
+def async_client() -> httpx.AsyncClient:
+    """Create an async client with the shared settings.
+
+    Async clients are bound to the event loop they are used on, so each
+    source run gets its own; use it as an async context manager.
+    """
+    return httpx.AsyncClient(
+        timeout=TIMEOUT, headers=HEADERS, limits=LIMITS, follow_redirects=True
+    )
+
+
+def close() -> None:
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+def _retry_after(resp: httpx.Response, attempt: int) -> float | None:
+    """Seconds the server asked us to back off, or None if no retry is warranted."""
+    if resp.status_code not in (429, 503):
+        return None
+    header = resp.headers.get("Retry-After")
+    if header:
+        try:
+            return max(0.0, float(header))
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(header)
+            return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            pass
+    if resp.status_code == 429:
+        return BACKOFF_BASE * (2 ** attempt)
+    return None
+
+
+def request(client: httpx.Client, method: str, url: str, **kwargs) -> httpx.Response:
+    """Send a request through the host's rate limiter, retrying on server push-back.
+
+    The last response is returned as-is once retries run out, so callers
+    still decide how to handle the error status.
+    """
+    limiter = ratelimit.limiter_for(url)
+    for attempt in range(MAX_RETRIES + 1):
+        limiter.acquire()
+        resp = client.request(method, url, **kwargs)
+        delay = _retry_after(resp, attempt)
+        if delay is None or attempt == MAX_RETRIES:
+            return resp
+        limiter.penalize(delay)
+    return resp
+
+
+async def arequest(
+    client: httpx.AsyncClient, method: str, url: str, **kwargs
+) -> httpx.Response:
+    """Async counterpart of `request`."""
+    limiter = ratelimit.limiter_for(url)
+    for attempt in range(MAX_RETRIES + 1):
+        await limiter.acquire_async()
+        resp = await client.request(method, url, **kwargs)
+        delay = _retry_after(resp, attempt)
+        if delay is None or attempt == MAX_RETRIES:
+            return resp
+        limiter.penalize(delay)
+    return resp
+
+
+def _cache_file(url: str, params: dict | None) -> Path | None:
+    if _cache_dir is None:
+        return None
+    full_url = str(httpx.URL(url, params=params))
+    return _cache_dir / f"{hashlib.sha256(full_url.encode()).hexdigest()}.json"
+
+
+def _conditional_headers(path: Path | None, headers: dict | None) -> dict:
+    merged = dict(headers or {})
+    if path is None or not path.exists():
+        return merged
+    try:
+        validators = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return merged
+    if validators.get("etag"):
+        merged["If-None-Match"] = validators["etag"]
+    if validators.get("last_modified"):
+        merged["If-Modified-Since"] = validators["last_modified"]
+    return merged
+
+
+def _remember(path: Path | None, resp: httpx.Response) -> None:
+    """Stage the response's validators; a 304 just confirms the stored ones."""
+    if path is None:
+        return
+    if is_not_modified(resp):
+        validators = None
+    elif resp.is_success:
+        validators = {
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+        }
+        if not any(validators.values()):
+            return
+    else:
+        return
+    with _staged_lock:
+        _staged[path] = validators
+
+
+def save_validators() -> None:
+    """Write the staged validators and prune ones no response has confirmed lately.
+
+    Call once the grants from this run's responses are safely written:
+    until then a failed run leaves the old validators in place, so the
+    next run fetches those documents in full instead of getting a 304.
+    """
+    if _cache_dir is None:
+        return
+    with _staged_lock:
+        staged = dict(_staged)
+        _staged.clear()
+    for path, validators in staged.items():
+        if validators is None:
+            if path.exists():
+                path.touch()
+            continue
+        # Write atomically so a concurrent run never reads a half-written file
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(validators, f)
+        os.replace(tmp, path)
+
+    cutoff = time.time() - VALIDATOR_MAX_AGE
+    for path in _cache_dir.glob("*.json"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+        except OSError:
+            pass
+
+
+def is_not_modified(resp: httpx.Response) -> bool:
+    return resp.status_code == 304
+
+
+@contextmanager
+def conditional_get(
+    client: httpx.Client, url: str, params: dict | None = None, headers: dict | None = None
+) -> Iterator[httpx.Response]:
+    """GET with If-None-Match/If-Modified-Since from the last successful response.
+
+    Callers should check `is_not_modified` before `raise_for_status` and skip
+    parsing entirely on a 304. The response's validators are only staged
+    once the caller's block finishes without error. Meant for single
+    documents: a 304 on one page of a result set says nothing about the
+    pages after it.
+    """
+    path = _cache_file(url, params)
+    resp = request(client, "GET", url, params=params, headers=_conditional_headers(path, headers))
+    yield resp
+    _remember(path, resp)
+
+
+@asynccontextmanager
+async def aconditional_get(
+    client: httpx.AsyncClient, url: str, params: dict | None = None, headers: dict | None = None
+) -> AsyncIterator[httpx.Response]:
+    """Async counterpart of `conditional_get`."""
+    path = _cache_file(url, params)
+    resp = await arequest(
+        client, "GET", url, params=params, headers=_conditional_headers(path, headers)
+    )
+    yield resp
+    _remember(path, resp)
+
+
+@contextmanager
+def conditional_stream(
+    client: httpx.Client, url: str, params: dict | None = None, headers: dict | None = None
+) -> Iterator[httpx.Response]:
+    """Streaming counterpart of `conditional_get`, for bodies too large to buffer.
+
+    Yields an unread response; iterate `resp.iter_bytes()` to consume it.
+    Validators are only staged once the caller's block finishes without
+    error, so a feed that failed to parse is fetched in full next time.
+    """
+    path = _cache_file(url, params)
+    limiter = ratelimit.limiter_for(url)
+    for attempt in range(MAX_RETRIES + 1):
+        limiter.acquire()
+        with client.stream(
+            "GET", url, params=params, headers=_conditional_headers(path, headers)
+        ) as resp:
+            delay = _retry_after(resp, attempt)
+            if delay is None or attempt == MAX_RETRIES:
+                yield resp
+                _remember(path, resp)
+                return
+        limiter.penalize(delay)
@@ -0,0 +1,135 @@
+import asyncio
+import logging
+import math
+from dataclasses import dataclass
+from functools import partial
+from typing import Awaitable, Callable
+
+import httpx
+
+from grant_researcher.db import GrantWriter
+from grant_researcher.sources import http
+from grant_researcher.sources.fanout import fan_out
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on pages fetched per query, so a very broad keyword can't
+# page through an entire catalogue
+DEFAULT_MAX_PAGES = 10
+
+
+@dataclass
+class Page:
+    items: list[dict]
+    total: int | None = None  # total hits reported by the API, if it reports one
+
+
+async def paginate(
+    fetch_page: Callable[[int], Awaitable[Page]],
+    on_page: Callable[[Page], int],
+    page_size: int,
+    max_pages: int,
+    concurrency: int,
+    label: str,
+) -> tuple[int, bool]:
+    """Fetch every page of a result set, handing each page to `on_page` as it arrives.
+
+    When the first page reports a total hit count, the remaining pages are
+    fetched concurrently; otherwise pages are fetched one after another until
+    a short page comes back. Stops at `max_pages` and logs a warning if
+    results were left behind. Returns the sum of `on_page` results and
+    whether the cap cut the result set short.
+    """
+    first = await fetch_page(0)
+    stored = on_page(first)
+
+    if first.total is not None:
+        available = math.ceil(first.total / page_size)
+
+        async def fetch_and_store(page: int) -> int:
+            return on_page(await fetch_page(page))
+
+        pages = range(1, min(available, max_pages))
+        stored += sum(await fan_out(pages, fetch_and_store, concurrency))
+        truncated = available > max_pages
+    else:
+        page, current = 1, first
+        while len(current.items) >= page_size and page < max_pages:
+            current = await fetch_page(page)
+            stored += on_page(current)
+            page += 1
+        truncated = len(current.items) >= page_size
+
+    if truncated:
+        logger.warning(
+            "%s: stopped at the %d-page cap; more results are available", label, max_pages
+        )
+    return stored, truncated
+
+
+async def search_keywords(
+    keywords: list[str],
+    writer: GrantWriter,
+    fetch_page: Callable[[httpx.AsyncClient, str, int], Awaitable[Page]],
+    normalize: Callable[[dict], dict],
+    page_size: int,
+    concurrency: int,
+    max_pages: int,
+    source: str,
+    label: str,
+) -> int:
+    """Search a paginated API for all keywords concurrently, following every result page.
+
+    `fetch_page(client, keyword, page)` fetches one page; each item is passed
+    through `normalize` and upserted unless it has no external id. At most
+    `concurrency` requests are in flight at once, across keywords and pages.
+    If any keyword hits the page cap, `source` is marked truncated on the
+    writer. Returns count of grants stored.
+    """
+    limit = asyncio.Semaphore(concurrency)
+
+    def store(page: Page) -> int:
+        total = 0
+        for item in page.items:
+            grant = normalize(item)
+            if grant["external_id"]:
+                writer.upsert(grant)
+                total += 1
+        return total
+
+    async with http.async_client() as client:
+        async def fetch(keyword: str, page: int) -> Page:
+            async with limit:
+                return await fetch_page(client, keyword, page)
+
+        async def search_keyword(keyword: str) -> int:
+            stored, truncated = await paginate(
+                partial(fetch, keyword), store, page_size, max_pages, concurrency,
+                label=f"{label} '{keyword}'",
+            )
+            if truncated:
+                writer.mark_truncated(source)
+            return stored
+
+        counts = await fan_out(keywords, search_keyword, concurrency)
+    return sum(counts)
+
+
+def search_all(
+    keywords: list[str],
+    writer: GrantWriter,
+    fetch_page: Callable[[httpx.AsyncClient, str, int], Awaitable[Page]],
+    normalize: Callable[[dict], dict],
+    page_size: int,
+    concurrency: int,
+    max_pages: int,
+    source: str,
+    label: str,
+) -> int:
+    """Synchronous wrapper around `search_keywords`."""
+    return asyncio.run(
+        search_keywords(
+            keywords, writer, fetch_page, normalize, page_size, concurrency, max_pages,
+            source, label,
+        )
+    )
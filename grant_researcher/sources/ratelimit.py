@@ -0,0 +1,96 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from urllib.parse import urlparse
+
+
+@dataclass
+class LimiterStats:
+    requests: int = 0
+    waits: int = 0
+    wait_seconds: float = 0.0
+    throttled: int = 0  # times the server pushed back (429 / Retry-After)
+
+
+class TokenBucket:
+    """Token bucket for one host, shared by threads and event loops alike.
+
+    `rate` is in requests per second; None means no client-side limit, but
+    server push-back via `penalize` is still honoured. Waiting is done by
+    reserving a slot under a lock and then sleeping outside it, so the same
+    bucket works for `time.sleep` callers and `asyncio.sleep` callers.
+    """
+
+    def __init__(self, rate: float | None = None, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self.stats = LimiterStats()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Claim the next request slot and return how long to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._blocked_until)
+            delay = start - now
+            if self.rate:
+                elapsed = max(0.0, start - self._updated)
+                self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+                self._updated = start
+                self._tokens -= 1
+                if self._tokens < 0:
+                    delay += -self._tokens / self.rate
+            self.stats.requests += 1
+            if delay > 0:
+                self.stats.waits += 1
+                self.stats.wait_seconds += delay
+            return delay
+
+    def acquire(self) -> None:
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def penalize(self, delay: float) -> None:
+        """Hold off every request to this host for `delay` seconds."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+            self._tokens = min(self._tokens, 0.0)
+            self.stats.throttled += 1
+
+
+_limiters: dict[str, TokenBucket] = {}
+_limiters_lock = threading.Lock()
+
+
+def _host(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+def configure(url: str, rate: float | None, burst: int = 1) -> None:
+    """Set the request rate for the host serving `url`, replacing any earlier limiter."""
+    with _limiters_lock:
+        _limiters[_host(url)] = TokenBucket(rate, burst)
+
+
+def limiter_for(url: str) -> TokenBucket:
+    host = _host(url)
+    with _limiters_lock:
+        if host not in _limiters:
+            _limiters[host] = TokenBucket()
+        return _limiters[host]
+
+
+def stats() -> dict[str, LimiterStats]:
+    """Per-host request and wait counters since the limiters were configured."""
+    with _limiters_lock:
+        return {host: bucket.stats for host, bucket in _limiters.items()}
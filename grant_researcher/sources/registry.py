@@ -0,0 +1,124 @@
+import importlib
+from dataclasses import dataclass, field
+from types import ModuleType
+
+
+@dataclass(frozen=True)
+class SourceSpec:
+    """A grant source and what it needs, known without importing its module.
+
+    Every source module exposes `search_grants(keywords, writer, **kwargs)`;
+    the kwargs it accepts follow from the declared credentials and
+    capabilities.
+    """
+
+    name: str  # key used in grants.source, config.yaml and --sources
+    label: str  # display name
+    module: str  # imported on first use
+    url_attr: str = "SEARCH_URL"  # module attribute the rate limiter is keyed on
+    # Requests per second to the source's host; None leaves it unthrottled
+    rate_limit: float | None = None
+    # search_grants kwarg -> Config attribute; the source is skipped unless all are set
+    credentials: dict[str, str] = field(default_factory=dict)
+    aliases: tuple[str, ...] = ()
+    uses_keywords: bool = True  # searches with the configured keywords
+    supports_since: bool = False  # accepts since= and searches only the delta
+    supports_pagination: bool = False  # accepts max_pages=
+    supports_concurrency: bool = False  # accepts concurrency=
+
+    def load(self) -> ModuleType:
+        return importlib.import_module(self.module)
+
+
+# In the order sources are started
+SOURCES = [
+    SourceSpec(
+        name="grants.gov",
+        label="Grants.gov",
+        module="grant_researcher.sources.grants_gov",
+        rate_limit=5.0,
+        aliases=("grants",),
+        supports_pagination=True,
+        supports_concurrency=True,
+    ),
+    SourceSpec(
+        name="sbir.gov",
+        label="SBIR.gov",
+        module="grant_researcher.sources.sbir_gov",
+        rate_limit=2.0,
+        aliases=("sbir",),
+        supports_pagination=True,
+        supports_concurrency=True,
+    ),
+    SourceSpec(
+        name="trb.rip",
+        label="TRB RIP",
+        module="grant_researcher.sources.trb_rip",
+        url_attr="RSS_URL",
+        # Be respectful to rip.trb.org
+        rate_limit=2.0,
+        aliases=("trb",),
+        # Searches its own broader keyword set
+        uses_keywords=False,
+    ),
+    SourceSpec(
+        name="eu.funding",
+        label="EU Funding & Tenders",
+        module="grant_researcher.sources.eu_funding",
+        url_attr="RSS_URL",
+        # A single feed download per run, so no client-side limit is needed
+        rate_limit=None,
+        aliases=("eu",),
+        # Filters the feed by its own keyword list
+        uses_keywords=False,
+    ),
+    SourceSpec(
+        name="ted.europa.eu",
+        label="TED",
+        module="grant_researcher.sources.ted_eu",
+        rate_limit=1.0,
+        aliases=("ted",),
+        uses_keywords=False,
+        supports_since=True,
+    ),
+    SourceSpec(
+        name="google.search",
+        label="Google Search",
+        module="grant_researcher.sources.google_search",
+        rate_limit=2.0,
+        credentials={"api_key": "google_api_key", "cse_id": "google_cse_id"},
+        aliases=("google",),
+        supports_concurrency=True,
+    ),
+    SourceSpec(
+        name="sam.gov",
+        label="SAM.gov",
+        module="grant_researcher.sources.sam_gov",
+        # SAM.gov enforces a daily request quota per key
+        rate_limit=4.0,
+        credentials={"api_key": "sam_api_key"},
+        aliases=("sam",),
+        supports_since=True,
+        supports_pagination=True,
+        supports_concurrency=True,
+    ),
+]
+
+
+def get_source(name: str) -> SourceSpec:
+    """Look a source up by name or alias. Raises KeyError if there is none."""
+    for spec in SOURCES:
+        if name == spec.name or name in spec.aliases:
+            return spec
+    raise KeyError(name)
+
+
+def select_sources(names: list[str] | None) -> list[SourceSpec]:
+    """Resolve source names or aliases to specs in registry order; None selects all.
+
+    Raises KeyError for the first unknown name.
+    """
+    if not names:
+        return list(SOURCES)
+    selected = {get_source(n.strip().lower()).name for n in names if n.strip()}
+    return [spec for spec in SOURCES if spec.name in selected]
@@ -0,0 +1,40 @@
+import xml.etree.ElementTree as ET
+from typing import Iterable, Iterator
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1].lower()
+
+
+def iter_items(chunks: Iterable[bytes]) -> Iterator[dict[str, str]]:
+    """Yield each RSS <item> as a dict of child tag -> stripped text.
+
+    The feed is fed to a pull parser chunk by chunk and every item is
+    detached from the tree once yielded, so memory stays flat no matter how
+    large the feed grows. Tag names are lowercased with any namespace
+    dropped (e.g. "pubdate"). Raises ET.ParseError on malformed XML; items
+    yielded before the error remain valid.
+    """
+    parser = ET.XMLPullParser(events=("start", "end"))
+    stack: list[ET.Element] = []
+
+    def drain() -> Iterator[dict[str, str]]:
+        for event, elem in parser.read_events():
+            if event == "start":
+                stack.append(elem)
+                continue
+            stack.pop()
+            if _local_name(elem.tag) != "item":
+                continue
+            yield {
+                _local_name(child.tag): (child.text or "").strip()
+                for child in elem
+            }
+            if stack:
+                stack[-1].remove(elem)
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from drain()
+    parser.close()
+    yield from drain()
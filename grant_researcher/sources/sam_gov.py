@@ -1,17 +1,36 @@
 import json
-from datetime import datetime, timedelta
-from sqlite3 import Connection
+from datetime import datetime, timedelta, timezone
+from functools import partial
 
 import httpx
 
-from grant_researcher.db import upsert_grant
+from grant_researcher.db import GrantWriter
+from grant_researcher.sources import http
+from grant_researcher.sources.paging import DEFAULT_MAX_PAGES, Page, search_all
 
 SEARCH_URL = "https://api.sam.gov/opportunities/v2/search"
 
+# SAM.gov enforces a daily request quota per key, so stay gentle
+DEFAULT_CONCURRENCY = 2
+PAGE_SIZE = 100
+# Window searched on a full resync; incremental runs start at the watermark
+DEFAULT_LOOKBACK_DAYS = 90
+MAX_LOOKBACK_DAYS = 364
 
-def _build_params(keyword: str, api_key: str) -> dict:
-    today = datetime.now()
-    posted_from = (today - timedelta(days=90)).strftime("%m/%d/%Y")
+
+def _posted_from(today: datetime, since: datetime | None) -> datetime:
+    if since is None:
+        return today - timedelta(days=DEFAULT_LOOKBACK_DAYS)
+    # postedFrom has day granularity; overlap a day so nothing posted around
+    # the last run is missed, and stay inside the API's one-year window
+    return max(since - timedelta(days=1), today - timedelta(days=MAX_LOOKBACK_DAYS))
+
+
+def _build_params(
+    keyword: str, api_key: str, page: int = 0, since: datetime | None = None
+) -> dict:
+    today = datetime.now(timezone.utc)
+    posted_from = _posted_from(today, since).strftime("%m/%d/%Y")
     posted_to = today.strftime("%m/%d/%Y")
 
     return {
@@ -20,8 +39,8 @@ def _build_params(keyword: str, api_key: str) -> dict:
         "postedTo": posted_to,
         "title": keyword,
         "ptype": "o,p,k",
-        "limit": 100,
-        "offset": 0,
+        "limit": PAGE_SIZE,
+        "offset": page * PAGE_SIZE,
     }
 
 
@@ -40,21 +59,36 @@ def _normalize(opp: dict) -> dict:
     }
 
 
-def search_grants(keywords: list[str], conn: Connection, api_key: str) -> int:
-    """Search SAM.gov for each keyword, upsert results. Returns count of grants stored."""
-    total = 0
-    with httpx.Client(timeout=30) as client:
-        for keyword in keywords:
-            params = _build_params(keyword, api_key)
-            resp = client.get(SEARCH_URL, params=params)
-            resp.raise_for_status()
-            data = resp.json()
-
-            opportunities = data.get("opportunitiesData", [])
-            for opp in opportunities:
-                grant = _normalize(opp)
-                if grant["external_id"]:
-                    upsert_grant(conn, grant)
-                    total += 1
-
-    return total
+async def _fetch_page(
+    client: httpx.AsyncClient,
+    keyword: str,
+    page: int,
+    api_key: str,
+    since: datetime | None,
+) -> Page:
+    resp = await http.arequest(
+        client, "GET", SEARCH_URL, params=_build_params(keyword, api_key, page, since)
+    )
+    resp.raise_for_status()
+    data = resp.json()
+    return Page(data.get("opportunitiesData", []), data.get("totalRecords"))
+
+
+def search_grants(
+    keywords: list[str],
+    writer: GrantWriter,
+    api_key: str,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    max_pages: int = DEFAULT_MAX_PAGES,
+    since: datetime | None = None,
+) -> int:
+    """Search SAM.gov for each keyword, upsert results. Returns count of grants stored.
+
+    With `since`, only notices posted after that time are requested;
+    otherwise the last DEFAULT_LOOKBACK_DAYS are searched.
+    """
+    return search_all(
+        keywords, writer, partial(_fetch_page, api_key=api_key, since=since), _normalize,
+        PAGE_SIZE, concurrency, max_pages,
+        source="sam.gov", label="SAM.gov",
+    )
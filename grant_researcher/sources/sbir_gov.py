@@ -1,20 +1,24 @@
 import json
-import time
-from sqlite3 import Connection
 
 import httpx
 
-from grant_researcher.db import upsert_grant
+from grant_researcher.db import GrantWriter
+from grant_researcher.sources import http
+from grant_researcher.sources.paging import DEFAULT_MAX_PAGES, Page, search_all
 
 SEARCH_URL = "https://api.www.sbir.gov/public/api/solicitations"
 
+# SBIR.gov rate-limits aggressively; keep few requests in flight
+DEFAULT_CONCURRENCY = 2
+PAGE_SIZE = 50
 
-def _build_params(keyword: str) -> dict:
+
+def _build_params(keyword: str, page: int = 0) -> dict:
     return {
         "keyword": keyword,
         "open": "1",
-        "rows": 50,
-        "start": 0,
+        "rows": PAGE_SIZE,
+        "start": page * PAGE_SIZE,
     }
 
 
@@ -40,35 +44,24 @@ def _normalize(sol: dict) -> dict:
     }
 
 
-def _get_with_retry(client: httpx.Client, url: str, params: dict, max_retries: int = 4) -> httpx.Response:
-    for attempt in range(max_retries):
-        resp = client.get(url, params=params)
-        if resp.status_code == 429:
-            wait = 3 * (2 ** attempt)  # 3, 6, 12, 24s
-            time.sleep(wait)
-            continue
-        resp.raise_for_status()
-        return resp
+async def _fetch_page(client: httpx.AsyncClient, keyword: str, page: int) -> Page:
+    resp = await http.arequest(client, "GET", SEARCH_URL, params=_build_params(keyword, page))
     resp.raise_for_status()
-    return resp
-
-
-def search_grants(keywords: list[str], conn: Connection) -> int:
+    data = resp.json()
+    # The solicitations API returns a bare list with no total hit count, so
+    # paginate() keeps requesting pages until a short one comes back
+    solicitations = data if isinstance(data, list) else data.get("data", [])
+    return Page(solicitations)
+
+
+def search_grants(
+    keywords: list[str],
+    writer: GrantWriter,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    max_pages: int = DEFAULT_MAX_PAGES,
+) -> int:
     """Search SBIR.gov for each keyword, upsert results. Returns count of grants stored."""
-    total = 0
-    with httpx.Client(timeout=30) as client:
-        for keyword in keywords:
-            params = _build_params(keyword)
-            resp = _get_with_retry(client, SEARCH_URL, params)
-            data = resp.json()
-
-            solicitations = data if isinstance(data, list) else data.get("data", [])
-            for sol in solicitations:
-                grant = _normalize(sol)
-                if grant["external_id"]:
-                    upsert_grant(conn, grant)
-                    total += 1
-
-            time.sleep(0.5)
-
-    return total
+    return search_all(
+        keywords, writer, _fetch_page, _normalize, PAGE_SIZE, concurrency, max_pages,
+        source="sbir.gov", label="SBIR.gov",
+    )
@@ -1,11 +1,14 @@
 import json
-import time
+import logging
 from datetime import datetime, timedelta, timezone
-from sqlite3 import Connection
+from typing import Iterator
 
 import httpx
 
-from grant_researcher.db import upsert_grant
+from grant_researcher.db import GrantWriter
+from grant_researcher.sources import http
+
+logger = logging.getLogger(__name__)
 
 SEARCH_URL = "https://api.ted.europa.eu/v3/notices/search"
 
@@ -17,53 +20,60 @@ _KEYWORDS = (
 )
 
 
-def _build_query() -> str:
-    cutoff = (datetime.now(timezone.utc) - timedelta(days=90)).strftime("%Y%m%d")
-    return f"{_KEYWORDS} AND publication-date > {cutoff}"
+# Window searched on a full resync; incremental runs start at the watermark
+DEFAULT_LOOKBACK_DAYS = 90
+
+
+def _build_query(since: datetime | None = None) -> str:
+    if since is None:
+        cutoff = datetime.now(timezone.utc) - timedelta(days=DEFAULT_LOOKBACK_DAYS)
+    else:
+        # publication-date has day granularity; overlap a day around the last run
+        cutoff = since - timedelta(days=1)
+    return f"{_KEYWORDS} AND publication-date > {cutoff.strftime('%Y%m%d')}"
+
 
 FIELDS = ["publication-number", "publication-date", "notice-title"]
 
 PAGE_LIMIT = 100
 MAX_PAGES = 5
-REQUEST_DELAY = 1.0
 
 
-def _build_payload(page: int = 1) -> dict:
+def _build_payload(page: int = 1, since: datetime | None = None) -> dict:
     return {
-        "query": _build_query(),
+        "query": _build_query(since),
         "fields": FIELDS,
         "page": page,
         "limit": PAGE_LIMIT,
     }
 
 
-def _fetch_notices(client: httpx.Client) -> list[dict]:
-    """Fetch matching notices, paginating with delays to avoid rate limits."""
-    notices = []
+def _iter_pages(
+    client: httpx.Client, since: datetime | None = None
+) -> Iterator[tuple[list[dict], int]]:
+    """Yield (notices, total notice count) page by page through the TED rate limiter.
+
+    HTTP errors propagate so that a failed run never advances the watermark;
+    notices from pages already fetched have been yielded by then.
+    """
+    fetched = 0
 
     for page in range(1, MAX_PAGES + 1):
-        if page > 1:
-            time.sleep(REQUEST_DELAY)
-
-        payload = _build_payload(page=page)
-        try:
-            resp = client.post(SEARCH_URL, json=payload)
-            resp.raise_for_status()
-        except httpx.HTTPError:
-            break
+        payload = _build_payload(page=page, since=since)
+        resp = http.request(client, "POST", SEARCH_URL, json=payload)
+        resp.raise_for_status()
 
         data = resp.json()
         results = data.get("notices", [])
         if not results:
             break
 
-        notices.extend(results)
-
         total = data.get("totalNoticeCount", 0)
-        if len(notices) >= total:
-            break
+        yield results, total
+        fetched += len(results)
 
-    return notices
+        if fetched >= total:
+            break
 
 
 def _normalize(notice: dict) -> dict:
@@ -92,25 +102,32 @@ def _normalize(notice: dict) -> dict:
     }
 
 
-def search_grants(keywords: list[str], conn: Connection) -> int:
+def search_grants(
+    keywords: list[str], writer: GrantWriter, since: datetime | None = None
+) -> int:
     """Search TED for aviation-related procurement notices, upsert results.
 
     The `keywords` arg from config is ignored — we use a fixed aviation query.
+    With `since`, only notices published after that time are requested.
+    If MAX_PAGES cuts the results short, the source is marked truncated on
+    the writer.
     """
-    total = 0
-
-    try:
-        with httpx.Client(timeout=30, follow_redirects=True) as client:
-            notices = _fetch_notices(client)
-    except httpx.HTTPError:
-        return 0
-
-    for notice in notices:
-        if not notice.get("publication-number"):
-            continue
-
-        grant = _normalize(notice)
-        upsert_grant(conn, grant)
-        total += 1
-
-    return total
+    stored = fetched = available = 0
+
+    for notices, available in _iter_pages(http.get_client(), since):
+        fetched += len(notices)
+        for notice in notices:
+            if not notice.get("publication-number"):
+                continue
+
+            grant = _normalize(notice)
+            writer.upsert(grant)
+            stored += 1
+
+    if fetched < available:
+        logger.warning(
+            "TED: stopped at the %d-page cap with %d of %d notices fetched",
+            MAX_PAGES, fetched, available,
+        )
+        writer.mark_truncated("ted.europa.eu")
+    return stored
@@ -1,12 +1,12 @@
 import json
 import re
-import time
-from sqlite3 import Connection
+import xml.etree.ElementTree as ET
+from typing import Iterable, Iterator
 
 import httpx
-from bs4 import BeautifulSoup
 
-from grant_researcher.db import upsert_grant
+from grant_researcher.db import GrantWriter
+from grant_researcher.sources import http, rss
 
 RSS_URL = "https://rip.trb.org/Record/RSS"
 
@@ -38,39 +38,28 @@ TRB_KEYWORDS = [
     "aviation safety",
 ]
 
-# Pause between requests to be respectful to the server
-REQUEST_DELAY = 0.5
 
+def _parse_item(item: dict[str, str]) -> dict | None:
+    """Turn one RSS item into a project dict, or None if it has no accession."""
+    url = item.get("guid", "")
+    accession = url.split("/")[-1]
+    if not accession:
+        return None
 
-def _parse_rss(xml_text: str) -> list[dict]:
-    """Parse RSS XML and return list of project dicts."""
-    soup = BeautifulSoup(xml_text, "html.parser")
-    projects = []
-
-    for item in soup.find_all("item"):
-        title_tag = item.find("title")
-        guid_tag = item.find("guid")
-        desc_tag = item.find("description")
-
-        if not guid_tag:
-            continue
-
-        url = guid_tag.text.strip()
-        accession = url.split("/")[-1]
-        if not accession:
-            continue
-
-        title = title_tag.text.strip() if title_tag else ""
-        description = desc_tag.text.strip() if desc_tag else ""
+    return {
+        "accession": accession,
+        "title": item.get("title", ""),
+        "description": item.get("description", ""),
+        "url": url,
+    }
 
-        projects.append({
-            "accession": accession,
-            "title": title,
-            "description": description,
-            "url": url,
-        })
 
-    return projects
+def _iter_projects(chunks: Iterable[bytes]) -> Iterator[dict]:
+    """Stream project dicts out of an RSS response, one item at a time."""
+    for item in rss.iter_items(chunks):
+        project = _parse_item(item)
+        if project:
+            yield project
 
 
 def _is_non_grant(title: str) -> bool:
@@ -101,7 +90,7 @@ def _normalize(record: dict) -> dict:
     }
 
 
-def search_grants(keywords: list[str], conn: Connection) -> int:
+def search_grants(keywords: list[str], writer: GrantWriter) -> int:
     """Search TRB RIP RSS feed with broad aviation keywords, upsert results.
 
     The `keywords` arg from config is ignored — we use our own broader set
@@ -111,34 +100,36 @@ def search_grants(keywords: list[str], conn: Connection) -> int:
     seen_ids = set()
     seen_titles = set()
 
-    with httpx.Client(timeout=30, follow_redirects=True) as client:
-        for keyword in TRB_KEYWORDS:
-            try:
-                resp = client.get(RSS_URL, params={"q": keyword},
-                                  headers={"Accept": "application/rss+xml,text/xml"})
-                resp.raise_for_status()
-            except httpx.HTTPError:
-                continue
-
-            for project in _parse_rss(resp.text):
-                if project["accession"] in seen_ids:
-                    continue
-                seen_ids.add(project["accession"])
-
-                title = project.get("title", "")
-                if _is_non_grant(title):
-                    continue
-
-                # Skip near-duplicate titles (e.g. "Project #20" vs "Project 20")
-                tk = _title_key(title)
-                if tk in seen_titles:
+    client = http.get_client()
+    for keyword in TRB_KEYWORDS:
+        try:
+            with http.conditional_stream(
+                client, RSS_URL, params={"q": keyword},
+                headers={"Accept": "application/rss+xml,text/xml"},
+            ) as resp:
+                if http.is_not_modified(resp):
                     continue
-                seen_titles.add(tk)
-
-                grant = _normalize(project)
-                upsert_grant(conn, grant)
-                total += 1
+                resp.raise_for_status()
 
-            time.sleep(REQUEST_DELAY)
+                for project in _iter_projects(resp.iter_bytes()):
+                    if project["accession"] in seen_ids:
+                        continue
+                    seen_ids.add(project["accession"])
+
+                    title = project.get("title", "")
+                    if _is_non_grant(title):
+                        continue
+
+                    # Skip near-duplicate titles (e.g. "Project #20" vs "Project 20")
+                    tk = _title_key(title)
+                    if tk in seen_titles:
+                        continue
+                    seen_titles.add(tk)
+
+                    grant = _normalize(project)
+                    writer.upsert(grant)
+                    total += 1
+        except (httpx.HTTPError, ET.ParseError):
+            continue
 
     return total
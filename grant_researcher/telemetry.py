@@ -0,0 +1,223 @@
+import re
+import sqlite3
+import statistics
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+# USD per million tokens: (input, output), by model family, i.e. the model
+# name without its date or -latest suffix. Families are matched exactly, so a
+# new model shows up as unpriced rather than at a sibling's price.
+# Cache writes cost 1.25x input, cache reads 0.1x input; batches are half price.
+PRICES = {
+    "claude-opus-4-5": (5.0, 25.0),
+    "claude-opus-4-1": (15.0, 75.0),
+    "claude-opus-4": (15.0, 75.0),
+    "claude-opus-4-0": (15.0, 75.0),
+    "claude-sonnet-4-5": (3.0, 15.0),
+    "claude-sonnet-4": (3.0, 15.0),
+    "claude-sonnet-4-0": (3.0, 15.0),
+    "claude-haiku-4-5": (1.0, 5.0),
+    "claude-3-5-haiku": (0.8, 4.0),
+}
+_MODEL_SUFFIX = re.compile(r"-(\d{8}|latest)$")
+CACHE_WRITE_MULTIPLIER = 1.25
+CACHE_READ_MULTIPLIER = 0.1
+BATCH_DISCOUNT = 0.5
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS llm_calls (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        started_at TEXT NOT NULL,
+        site TEXT NOT NULL,
+        run TEXT,
+        grant_id INTEGER,
+        model TEXT NOT NULL,
+        input_tokens INTEGER NOT NULL DEFAULT 0,
+        output_tokens INTEGER NOT NULL DEFAULT 0,
+        cache_read_tokens INTEGER NOT NULL DEFAULT 0,
+        cache_write_tokens INTEGER NOT NULL DEFAULT 0,
+        latency_ms INTEGER,
+        total_ms INTEGER,
+        retries INTEGER NOT NULL DEFAULT 0,
+        batch INTEGER NOT NULL DEFAULT 0,
+        error TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_llm_calls_started_at ON llm_calls(started_at);
+"""
+
+_conn: sqlite3.Connection | None = None
+_lock = threading.Lock()
+
+
+@dataclass
+class CallInfo:
+    """Where a model call comes from, recorded alongside its usage."""
+
+    site: str  # e.g. "match.triage", "evaluator.review"
+    run: str | None = None  # the match run, batch or evaluation it belongs to
+    grant_id: int | None = None
+
+
+def ensure_schema(conn: sqlite3.Connection) -> None:
+    conn.executescript(_SCHEMA)
+    conn.commit()
+
+
+def configure(db_path: Path | None) -> None:
+    """Record calls in the `llm_calls` table of `db_path`. None stops recording."""
+    global _conn
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+        if db_path is None:
+            return
+        # Written from the matcher's worker threads; every access holds _lock
+        _conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        ensure_schema(_conn)
+
+
+def record(
+    info: CallInfo | None,
+    model: str,
+    started_at: datetime,
+    usage: Any = None,
+    latency: float | None = None,
+    total: float | None = None,
+    retries: int = 0,
+    batch: bool = False,
+    error: str | None = None,
+) -> None:
+    """Store one model call. Latencies are in seconds; `usage` is the message's usage."""
+    if _conn is None:
+        return
+    info = info or CallInfo(site="unknown")
+    row = (
+        started_at.isoformat(timespec="seconds"),
+        info.site,
+        info.run,
+        info.grant_id,
+        model,
+        getattr(usage, "input_tokens", 0) or 0,
+        getattr(usage, "output_tokens", 0) or 0,
+        getattr(usage, "cache_read_input_tokens", 0) or 0,
+        getattr(usage, "cache_creation_input_tokens", 0) or 0,
+        None if latency is None else round(latency * 1000),
+        None if total is None else round(total * 1000),
+        retries,
+        int(batch),
+        error,
+    )
+    with _lock:
+        with _conn:
+            _conn.execute(
+                """
+                INSERT INTO llm_calls (
+                    started_at, site, run, grant_id, model, input_tokens, output_tokens,
+                    cache_read_tokens, cache_write_tokens, latency_ms, total_ms, retries,
+                    batch, error
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                row,
+            )
+
+
+def estimate_cost(row: dict) -> float | None:
+    """Estimated USD cost of one recorded call, or None for a model without a known price."""
+    price = PRICES.get(_MODEL_SUFFIX.sub("", row["model"]))
+    if price is None:
+        return None
+    input_price, output_price = price
+    cost = (
+        row["input_tokens"] * input_price
+        + row["cache_write_tokens"] * input_price * CACHE_WRITE_MULTIPLIER
+        + row["cache_read_tokens"] * input_price * CACHE_READ_MULTIPLIER
+        + row["output_tokens"] * output_price
+    ) / 1_000_000
+    return cost * BATCH_DISCOUNT if row["batch"] else cost
+
+
+@dataclass
+class Rollup:
+    key: str
+    calls: int = 0
+    errors: int = 0
+    retries: int = 0
+    cache_hits: int = 0  # calls that read their prompt prefix from the cache
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    cost: float = 0.0
+    unpriced: int = 0  # calls to models missing from PRICES
+    p50_ms: int | None = None
+    p95_ms: int | None = None
+    last_call: str = ""
+
+
+def _percentile(values: list[int], q: float) -> int | None:
+    if not values:
+        return None
+    if len(values) == 1:
+        return values[0]
+    return round(statistics.quantiles(values, n=100, method="inclusive")[int(q) - 1])
+
+
+def rollup(
+    conn: sqlite3.Connection, by: str, days: int | None = None, run: str | None = None
+) -> list[Rollup]:
+    """Totals per run, day, model or call site.
+
+    Runs and days come most recent first, models and call sites most
+    expensive first. `days` limits the rollup to calls started that many
+    days ago or later, `run` to the calls of one run.
+    """
+    ensure_schema(conn)
+    column = {
+        "run": "run", "day": "substr(started_at, 1, 10)", "model": "model", "site": "site"
+    }[by]
+    conditions, params = [], []
+    if days is not None:
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+        conditions.append("started_at >= ?")
+        params.append(since.isoformat(timespec="seconds"))
+    if run is not None:
+        conditions.append("run = ?")
+        params.append(run)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    rows = conn.execute(
+        f"SELECT *, COALESCE({column}, '-') AS rollup_key FROM llm_calls {where} ORDER BY id",
+        params,
+    ).fetchall()
+
+    groups: dict[str, Rollup] = {}
+    latencies: dict[str, list[int]] = {}
+    for r in rows:
+        r = dict(r)
+        g = groups.setdefault(r["rollup_key"], Rollup(r["rollup_key"]))
+        g.calls += 1
+        g.last_call = max(g.last_call, r["started_at"])
+        g.errors += r["error"] is not None
+        g.retries += r["retries"]
+        g.cache_hits += r["cache_read_tokens"] > 0
+        g.input_tokens += r["input_tokens"]
+        g.output_tokens += r["output_tokens"]
+        g.cache_read_tokens += r["cache_read_tokens"]
+        g.cache_write_tokens += r["cache_write_tokens"]
+        cost = estimate_cost(r)
+        if cost is None:
+            g.unpriced += 1
+        else:
+            g.cost += cost
+        if r["latency_ms"] is not None:
+            latencies.setdefault(g.key, []).append(r["latency_ms"])
+
+    for key, values in latencies.items():
+        groups[key].p50_ms = _percentile(values, 50)
+        groups[key].p95_ms = _percentile(values, 95)
+
+    key = (lambda g: g.last_call) if by in ("run", "day") else (lambda g: g.cost)
+    return sorted(groups.values(), key=key, reverse=True)
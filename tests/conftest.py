@@ -0,0 +1,68 @@
+import pytest
+
+from grant_researcher import db, llm, llm_cache, telemetry
+from grant_researcher.config import CompanyConfig, Config, SearchConfig
+
+WORDS = "airport runway safety machine learning surveillance small business research".split()
+
+
+@pytest.fixture
+def config(tmp_path):
+    return Config(
+        company=CompanyConfig(
+            name="Test Co",
+            description="Builds machine learning tools for airport safety.",
+            focus_areas=["runway safety"],
+            eligibility=["small business"],
+        ),
+        search=SearchConfig(),
+        anthropic_api_key="test-key",
+        sam_api_key="",
+        google_api_key="",
+        google_cse_id="",
+        project_dir=tmp_path,
+    )
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = db.init_db(tmp_path / "grants.db")
+    yield conn
+    conn.close()
+
+
+@pytest.fixture(autouse=True)
+def isolated_gateway(tmp_path, monkeypatch):
+    """Record telemetry into the test database; no response cache, no real backoff."""
+    monkeypatch.setattr(llm, "BACKOFF_BASE", 0.001)
+    llm.configure()
+    llm_cache.configure(None)
+    telemetry.configure(tmp_path / "grants.db")
+    yield
+    telemetry.configure(None)
+    llm_cache.configure(None)
+
+
+@pytest.fixture
+def add_grants(conn):
+    """Store `count` open grants and return them as unscored rows."""
+
+    def add(count: int) -> list[dict]:
+        grants = [
+            {
+                "source": "grants.gov",
+                "external_id": str(i),
+                "title": f"Grant {i} {WORDS[i % len(WORDS)]}",
+                "agency": "FAA",
+                "description": " ".join(WORDS[(i + j) % len(WORDS)] for j in range(30)),
+                "deadline": None,
+                "url": f"https://example.org/{i}",
+                "amount": None,
+                "raw_json": "{}",
+            }
+            for i in range(count)
+        ]
+        db.upsert_grants(conn, grants)
+        return db.get_unscored_grants(conn)
+
+    return add
@@ -0,0 +1,219 @@
+"""In-process stand-ins for the Anthropic client, for exercising the matcher offline.
+
+    client = FakeAnthropic()
+    match_grants(config, conn, client=client)
+    assert client.requests[0]["system"][0]["cache_control"] == {"type": "ephemeral"}
+
+The Message Batches endpoints are faked too: a batch ends after
+`batch_polls` retrieve calls, and its results are produced by the same
+responder as regular messages. Requests whose custom_id is in `expired`
+come back expired.
+"""
+import copy
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+import anthropic
+import httpx
+
+
+@dataclass
+class FakeUsage:
+    input_tokens: int
+    output_tokens: int
+    cache_creation_input_tokens: int = 0
+    cache_read_input_tokens: int = 0
+
+
+@dataclass
+class FakeTextBlock:
+    text: str
+    type: str = "text"
+
+
+@dataclass
+class FakeMessage:
+    id: str
+    model: str
+    content: list[FakeTextBlock]
+    usage: FakeUsage
+    role: str = "assistant"
+    stop_reason: str = "end_turn"
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _text(blocks: Any) -> str:
+    if isinstance(blocks, str):
+        return blocks
+    return "".join(b.get("text", "") for b in blocks)
+
+
+def default_responder(request: dict) -> str:
+    """Pass every grant through triage and score every candidate 50."""
+    prompt = _text(request["messages"][-1]["content"])
+    if "SCORE:" in _text(request.get("system", "")):
+        return "SCORE: 50\nREASONING: Fake response."
+    numbers = re.findall(r"^(\d+)\. ", prompt, flags=re.MULTILINE)
+    return ", ".join(numbers) or "NONE"
+
+
+def status_error(status_code: int, retry_after: float | None = None) -> anthropic.APIStatusError:
+    """Build the error the SDK raises for an HTTP error status, e.g. 429 or 529."""
+    headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+    response = httpx.Response(
+        status_code,
+        headers=headers,
+        request=httpx.Request("POST", "https://api.anthropic.com/v1/messages"),
+    )
+    return anthropic.APIStatusError(f"HTTP {status_code}", response=response, body=None)
+
+
+@dataclass
+class FakeBatchRequestCounts:
+    processing: int = 0
+    succeeded: int = 0
+    errored: int = 0
+    canceled: int = 0
+    expired: int = 0
+
+
+@dataclass
+class FakeBatch:
+    id: str
+    processing_status: str
+    request_counts: FakeBatchRequestCounts
+    requests: list[dict] = field(repr=False, default_factory=list)
+    polls_left: int = field(repr=False, default=0)
+
+
+@dataclass
+class FakeBatchResultBody:
+    type: str
+    message: FakeMessage | None = None
+    error: Any = None
+
+
+@dataclass
+class FakeBatchResult:
+    custom_id: str
+    result: FakeBatchResultBody
+
+
+@dataclass
+class _Batches:
+    client: "FakeAnthropic"
+
+    def create(self, requests: list[dict]) -> FakeBatch:
+        client = self.client
+        with client._lock:
+            batch = FakeBatch(
+                id=f"msgbatch_fake_{len(client.batches) + 1}",
+                processing_status="in_progress",
+                request_counts=FakeBatchRequestCounts(processing=len(requests)),
+                requests=copy.deepcopy(requests),
+                polls_left=client.batch_polls,
+            )
+            client.batches[batch.id] = batch
+        return batch
+
+    def retrieve(self, batch_id: str) -> FakeBatch:
+        batch = self.client.batches[batch_id]
+        if batch.processing_status == "in_progress":
+            if batch.polls_left > 0:
+                batch.polls_left -= 1
+            else:
+                expired = sum(r["custom_id"] in self.client.expired for r in batch.requests)
+                batch.processing_status = "ended"
+                batch.request_counts = FakeBatchRequestCounts(
+                    succeeded=len(batch.requests) - expired, expired=expired
+                )
+        return batch
+
+    def results(self, batch_id: str):
+        batch = self.client.batches[batch_id]
+        if batch.processing_status != "ended":
+            raise status_error(400)
+        for request in batch.requests:
+            if request["custom_id"] in self.client.expired:
+                body = FakeBatchResultBody(type="expired")
+                yield FakeBatchResult(custom_id=request["custom_id"], result=body)
+                continue
+            try:
+                message = self.client._create(request["params"])
+            except anthropic.APIStatusError as e:
+                body = FakeBatchResultBody(type="errored", error=str(e))
+            else:
+                body = FakeBatchResultBody(type="succeeded", message=message)
+            yield FakeBatchResult(custom_id=request["custom_id"], result=body)
+
+
+@dataclass
+class _Messages:
+    client: "FakeAnthropic"
+
+    def __post_init__(self):
+        self.batches = _Batches(self.client)
+
+    def create(self, **kwargs) -> FakeMessage:
+        return self.client._create(kwargs)
+
+
+@dataclass
+class FakeAnthropic:
+    """Records every request and answers with `responder(request) -> text`.
+
+    The responder may raise (e.g. `status_error(429)`) to simulate API
+    errors. System blocks marked with cache_control are treated as cached
+    after first use, so usage reports cache writes and then cache reads
+    the way the real API does.
+    """
+
+    responder: Callable[[dict], str] = default_responder
+    # retrieve() calls that report a batch as in progress before it ends
+    batch_polls: int = 0
+    # custom_ids of batch requests that expire instead of running
+    expired: set[str] = field(default_factory=set)
+    requests: list[dict] = field(default_factory=list)
+    batches: dict[str, FakeBatch] = field(default_factory=dict)
+    _cached: set[str] = field(default_factory=set)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def __post_init__(self):
+        self.messages = _Messages(self)
+
+    def _usage(self, request: dict, text: str) -> FakeUsage:
+        system = request.get("system", [])
+        cached_prefix = "" if isinstance(system, str) else "".join(
+            b["text"] for b in system if b.get("cache_control")
+        )
+        uncached = _estimate_tokens(
+            _text(request["messages"][-1]["content"])
+            + (system if isinstance(system, str) else "")
+        )
+        usage = FakeUsage(input_tokens=uncached, output_tokens=_estimate_tokens(text))
+        if cached_prefix:
+            if cached_prefix in self._cached:
+                usage.cache_read_input_tokens = _estimate_tokens(cached_prefix)
+            else:
+                self._cached.add(cached_prefix)
+                usage.cache_creation_input_tokens = _estimate_tokens(cached_prefix)
+        return usage
+
+    def _create(self, request: dict) -> FakeMessage:
+        with self._lock:
+            self.requests.append(copy.deepcopy(request))
+            n = len(self.requests)
+        text = self.responder(request)
+        with self._lock:
+            usage = self._usage(request, text)
+        return FakeMessage(
+            id=f"msg_fake_{n}",
+            model=request["model"],
+            content=[FakeTextBlock(text)],
+            usage=usage,
+        )
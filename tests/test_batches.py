@@ -0,0 +1,138 @@
+import pytest
+from click.testing import CliRunner
+from fakes import FakeAnthropic, default_responder, status_error
+
+from grant_researcher import batches, cli, db
+from grant_researcher.batches import collect_match_batches, submit_match_batches
+from grant_researcher.matcher import SCORING_MODEL, TRIAGE_MODEL, profile_fingerprint
+
+
+def _scores(conn) -> dict[int, int | None]:
+    return dict(conn.execute("SELECT id, score FROM grants").fetchall())
+
+
+def test_submit_sends_triage_batch(config, conn, add_grants):
+    grants = add_grants(10)
+    client = FakeAnthropic()
+
+    assert submit_match_batches(config, conn, client=client) == 10
+
+    (batch,) = client.batches.values()
+    assert [r["params"]["model"] for r in batch.requests] == [TRIAGE_MODEL]
+    (row,) = db.get_open_match_batches(conn)
+    assert (row["id"], row["stage"]) == (batch.id, "triage")
+    assert db.get_match_batch_requests(conn, batch.id) == {
+        batch.requests[0]["custom_id"]: sorted(g["id"] for g in grants)
+    }
+    # Grants waiting on a batch are not submitted twice
+    assert submit_match_batches(config, conn, client=client) == 0
+    assert len(client.batches) == 1
+
+
+def test_collect_waits_for_in_progress_batch(config, conn, add_grants):
+    add_grants(5)
+    client = FakeAnthropic(batch_polls=1)
+    submit_match_batches(config, conn, client=client)
+    messages = []
+
+    result = collect_match_batches(config, conn, on_progress=messages.append, client=client)
+
+    assert (result.collected, result.pending) == (0, 1)
+    assert "is still in_progress" in messages[0]
+    assert client.requests == []
+    assert set(_scores(conn).values()) == {None}
+
+
+def test_collect_triage_then_scoring(config, conn, add_grants):
+    add_grants(5)
+    client = FakeAnthropic()
+    submit_match_batches(config, conn, client=client)
+
+    triage = collect_match_batches(config, conn, client=client)
+    assert (triage.collected, triage.submitted, triage.pending) == (1, 5, 1)
+    scoring_batch = list(client.batches.values())[-1]
+    assert {r["params"]["model"] for r in scoring_batch.requests} == {SCORING_MODEL}
+
+    scoring = collect_match_batches(config, conn, client=client)
+    assert (scoring.collected, scoring.scored, scoring.pending) == (1, 5, 0)
+    assert set(_scores(conn).values()) == {50}
+
+
+def test_errored_and_expired_requests_stay_unscored(config, conn, add_grants):
+    grants = add_grants(5)
+    errored, expired = grants[0], grants[1]
+
+    def responder(request):
+        if f"Title: {errored['title']}\n" in request["messages"][-1]["content"]:
+            raise status_error(500)
+        return default_responder(request)
+
+    client = FakeAnthropic(responder=responder, expired={f"score-{expired['id']}"})
+    submit_match_batches(config, conn, client=client)
+    collect_match_batches(config, conn, client=client)
+    result = collect_match_batches(config, conn, client=client)
+
+    assert (result.scored, result.failed) == (3, 2)
+    unscored = [id for id, score in _scores(conn).items() if score is None]
+    assert unscored == sorted([errored["id"], expired["id"]])
+    # The next run picks them up again
+    client.responder, client.expired = default_responder, set()
+    assert submit_match_batches(config, conn, client=client) == 2
+
+
+def test_match_batch_and_collect_commands(config, conn, add_grants, monkeypatch):
+    add_grants(3)
+    client = FakeAnthropic()
+    monkeypatch.setattr(batches, "make_client", lambda config: client)
+    monkeypatch.setattr(batches, "POLL_INTERVAL", 0)
+    runner = CliRunner()
+    obj = {"config": config, "conn": conn}
+
+    submitted = runner.invoke(cli.match, ["--batch"], obj=obj)
+    assert submitted.exit_code == 0, submitted.output
+    assert "Submitted 3 grant(s) for triage in 1 request(s)" in submitted.output
+
+    collected = runner.invoke(cli.match, ["--collect", "--wait"], obj=obj)
+    assert collected.exit_code == 0, collected.output
+    assert "Collected 2 batch(es): 3 grant(s) scored, 0 failed" in collected.output
+    assert set(_scores(conn).values()) == {50}
+
+
+def test_scores_keep_the_fingerprint_the_batch_was_built_from(config, conn, add_grants):
+    add_grants(5)
+
+    def keep_first(request):
+        answer = default_responder(request)
+        return answer if answer.startswith("SCORE") else "1"
+
+    client = FakeAnthropic(responder=keep_first)
+    submit_match_batches(config, conn, client=client)
+    old = profile_fingerprint(config, [])
+    # The profile changes while the triage batch is processing
+    config.company.description = "Builds rail freight scheduling software."
+    new = profile_fingerprint(config, [])
+
+    collect_match_batches(config, conn, client=client)
+    collect_match_batches(config, conn, client=client)
+
+    fingerprints = [r[0] for r in conn.execute("SELECT profile_fingerprint FROM grants")]
+    assert sorted(fingerprints) == sorted([new] + [old] * 4)
+    assert len(db.get_stale_grants(conn, new)) == 4
+
+
+def test_collect_applies_nothing_if_recording_fails(config, conn, add_grants, monkeypatch):
+    add_grants(5)
+    client = FakeAnthropic()
+    submit_match_batches(config, conn, client=client)
+
+    def crash(*args):
+        raise RuntimeError("crashed while recording the scoring batch")
+
+    monkeypatch.setattr(db, "_insert_match_batch", crash)
+    with pytest.raises(RuntimeError):
+        collect_match_batches(config, conn, client=client)
+
+    (row,) = db.get_open_match_batches(conn)
+    assert row["stage"] == "triage"
+    assert db.get_pending_batch_grant_ids(conn) == set(_scores(conn))
+    assert set(_scores(conn).values()) == {None}
@@ -0,0 +1,39 @@
+import pytest
+
+from grant_researcher import db
+
+
+@pytest.mark.parametrize(
+    "deadline, expected",
+    [
+        ("03/31/2027", "2027-03-31T00:00:00+00:00"),
+        ("Thu, 25 Jul 2024 22:00:00 GMT", "2024-07-25T22:00:00+00:00"),
+        ("2024-02-16Z", "2024-02-16T00:00:00+00:00"),
+        ("2024-02-16+01:00", "2024-02-15T23:00:00+00:00"),
+        ("2026-11-03T17:00:00-05:00", "2026-11-03T22:00:00+00:00"),
+        ("2026-11-03T17:00:00", "2026-11-03T17:00:00+00:00"),
+        ("Rolling", None),
+    ],
+)
+def test_deadline_at(deadline, expected):
+    assert db.deadline_at(deadline) == expected
+
+
+def test_init_db_reparses_unparsed_deadlines_once(tmp_path):
+    conn = db.init_db(tmp_path / "grants.db")
+    # A database from before ISO timestamps were parsed
+    conn.executemany(
+        "INSERT INTO grants (source, external_id, title, deadline, raw_json) "
+        "VALUES ('sam.gov', ?, 'Notice', ?, '{}')",
+        [("N1", "2026-11-03T17:00:00-05:00"), ("N2", "Rolling")],
+    )
+    conn.execute("PRAGMA user_version = 0")
+    conn.commit()
+    conn.close()
+
+    conn = db.init_db(tmp_path / "grants.db")
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 1
+    assert [r["deadline"] for r in db.get_unparsed_deadlines(conn)] == ["Rolling"]
+    assert conn.execute(
+        "SELECT deadline_at FROM grants WHERE external_id = 'N1'"
+    ).fetchone()[0] == "2026-11-03T22:00:00+00:00"
@@ -0,0 +1,44 @@
+import anthropic
+import pytest
+from fakes import FakeAnthropic, status_error
+
+from grant_researcher import llm
+
+MODEL = "claude-haiku-4-5"
+
+
+def _create(client):
+    return llm.create(
+        client, model=MODEL, max_tokens=10, messages=[{"role": "user", "content": "hi"}]
+    )
+
+
+def test_only_successes_raise_the_adaptive_limit():
+    limit = llm.AdaptiveLimit(8)
+    limit.acquire()
+    limit.release(llm.THROTTLED)
+    assert limit.limit == 4
+
+    for _ in range(3):
+        limit.acquire()
+        limit.release(llm.FAILED)
+    assert limit.limit == 4
+
+    limit.acquire()
+    limit.release(llm.SUCCESS)
+    assert limit.limit == 4.25
+
+
+def test_failed_requests_leave_the_model_limit_alone():
+    llm.configure(model_concurrency=4)
+    llm._model_limit(MODEL).limit = 2.0
+
+    def responder(request):
+        raise status_error(500)
+
+    with pytest.raises(anthropic.APIStatusError):
+        _create(FakeAnthropic(responder=responder))
+    assert llm._model_limit(MODEL).limit == 2.0
+
+    _create(FakeAnthropic())
+    assert llm._model_limit(MODEL).limit == 2.5
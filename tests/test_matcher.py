@@ -0,0 +1,88 @@
+from fakes import FakeAnthropic, default_responder
+
+from grant_researcher import db, llm_cache, telemetry
+from grant_researcher.matcher import (
+    SCORING_MODEL,
+    TRIAGE_MODEL,
+    match_grants,
+    profile_fingerprint,
+)
+
+
+def test_system_prompt_is_marked_for_caching(config, conn, add_grants):
+    add_grants(20)
+    client = FakeAnthropic()
+
+    match_grants(config, conn, client=client)
+
+    assert {r["model"] for r in client.requests} == {TRIAGE_MODEL, SCORING_MODEL}
+    for request in client.requests:
+        (block,) = request["system"]
+        assert block["cache_control"] == {"type": "ephemeral"}
+        # Grant text stays out of the cached prefix
+        assert "Grant " not in block["text"]
+
+
+def test_run_usage_counts_cached_input(config, conn, add_grants):
+    add_grants(20)
+    client = FakeAnthropic()
+    messages = []
+
+    match_grants(config, conn, on_progress=messages.append, client=client)
+
+    (run,) = telemetry.rollup(conn, "run")
+    assert run.key.startswith("match ")
+    assert run.calls == len(client.requests) == 21  # one triage batch, 20 scores
+    # The first triage and the first scoring request write the cached
+    # prefix; every later request reads it
+    assert run.cache_hits == run.calls - 2
+    triage_prefix, scoring_prefix = (
+        next(r["system"][0]["text"] for r in client.requests if r["model"] == model)
+        for model in (TRIAGE_MODEL, SCORING_MODEL)
+    )
+    assert run.cache_write_tokens == len(triage_prefix) // 4 + len(scoring_prefix) // 4
+    assert run.cache_read_tokens == (run.calls - 2) * (len(scoring_prefix) // 4)
+    assert f"Prompt cache: {run.cache_hits}/{run.calls} request(s) hit" in "\n".join(messages)
+
+
+def test_rejected_triage_answer_is_retried_not_cached(config, conn, add_grants, tmp_path):
+    add_grants(5)
+    llm_cache.configure(tmp_path / "llm_cache.db")
+
+    def out_of_range(request):
+        answer = default_responder(request)
+        return answer if answer.startswith("SCORE") else "1, 99"
+
+    match_grants(config, conn, client=FakeAnthropic(responder=out_of_range))
+    assert len(db.get_unscored_grants(conn)) == 5
+    assert llm_cache.summary()[0] == 0
+
+    client = FakeAnthropic()
+    match_grants(config, conn, client=client)
+    assert db.get_unscored_grants(conn) == []
+    assert client.requests
+
+
+def test_runs_started_in_the_same_second_roll_up_separately(config, conn, add_grants):
+    add_grants(3)
+    match_grants(config, conn, client=FakeAnthropic())
+    conn.execute("UPDATE grants SET score = NULL")
+    conn.commit()
+    messages = []
+
+    match_grants(config, conn, on_progress=messages.append, client=FakeAnthropic())
+
+    assert len(telemetry.rollup(conn, "run")) == 2
+    assert "Prompt cache: 2/4 request(s) hit" in "\n".join(messages)
+
+
+def test_profile_fingerprint_follows_the_prompt(config):
+    first, second = "A" * 3000, "B" * 3000
+    fingerprint = profile_fingerprint(config, [first, second])
+
+    # Past the excerpt each prompt shows, edits change nothing the model sees
+    assert profile_fingerprint(config, [first + " edited", second]) == fingerprint
+    assert profile_fingerprint(config, ["C" + first[1:], second]) != fingerprint
+    assert profile_fingerprint(config, [second, first]) != fingerprint
+    config.company.focus_areas.append("rail freight")
+    assert profile_fingerprint(config, [first, second]) != fingerprint
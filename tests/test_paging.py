@@ -0,0 +1,44 @@
+from grant_researcher.db import GrantWriter
+from grant_researcher.sources.paging import Page, search_all
+
+
+def _normalize(item: dict) -> dict:
+    return {"source": "test", "external_id": item["id"], "title": item["id"]}
+
+
+def test_search_all_follows_pages_and_skips_items_without_ids(conn):
+    hits = {
+        "runway": [{"id": f"r{i}"} for i in range(5)] + [{"id": ""}],
+        "radar": [{"id": "d0"}, {"id": "r0"}],
+    }
+    requested = []
+
+    async def fetch_page(client, keyword, page):
+        requested.append((keyword, page))
+        return Page(hits[keyword][page * 2:page * 2 + 2], len(hits[keyword]))
+
+    writer = GrantWriter(conn)
+    stored = search_all(
+        ["runway", "radar"], writer, fetch_page, _normalize,
+        page_size=2, concurrency=2, max_pages=10, source="test", label="Test",
+    )
+
+    assert stored == 7
+    assert sorted(requested) == [("radar", 0)] + [("runway", p) for p in range(3)]
+    # r0 came back for both keywords and is only kept once
+    assert writer.received == 7
+    assert writer.duplicates == 1
+
+
+def test_search_all_marks_the_source_truncated_at_the_page_cap(conn):
+    async def fetch_page(client, keyword, page):
+        return Page([{"id": f"{keyword}{page}"}], total=5)
+
+    writer = GrantWriter(conn)
+    stored = search_all(
+        ["runway"], writer, fetch_page, _normalize,
+        page_size=1, concurrency=1, max_pages=3, source="test", label="Test",
+    )
+
+    assert stored == 3
+    assert writer.truncated == {"test"}
@@ -0,0 +1,27 @@
+from datetime import datetime, timezone
+
+from grant_researcher.db import GrantWriter, get_source_watermark, set_source_watermark
+from grant_researcher.search import SourceTask, run_sources
+
+LAST_RUN = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def test_truncated_source_keeps_its_watermark(conn):
+    set_source_watermark(conn, "complete", LAST_RUN, 0)
+    set_source_watermark(conn, "capped", LAST_RUN, 0)
+
+    def capped(writer):
+        writer.mark_truncated("capped")
+        return 0
+
+    writer = GrantWriter(conn)
+    run_sources(
+        [
+            SourceTask("Complete", lambda writer: 0, state_key="complete"),
+            SourceTask("Capped", capped, state_key="capped"),
+        ],
+        writer, max_workers=2,
+    )
+
+    assert get_source_watermark(conn, "complete") > LAST_RUN
+    assert get_source_watermark(conn, "capped") == LAST_RUN
@@ -0,0 +1,34 @@
+import pytest
+
+from grant_researcher.telemetry import estimate_cost
+
+
+def _call(model: str, batch: bool = False) -> dict:
+    return {
+        "model": model,
+        "input_tokens": 1_000_000,
+        "output_tokens": 1_000_000,
+        "cache_read_tokens": 0,
+        "cache_write_tokens": 0,
+        "batch": batch,
+    }
+
+
+@pytest.mark.parametrize(
+    "model, cost",
+    [
+        ("claude-opus-4-5-20251101", 30.0),
+        ("claude-opus-4-1-20250805", 90.0),
+        ("claude-opus-4-20250514", 90.0),
+        ("claude-sonnet-4-5-20250929", 18.0),
+        ("claude-haiku-4-5-20251001", 6.0),
+        ("claude-3-5-haiku-latest", 4.8),
+        ("claude-opus-4-next", None),  # an unknown family is not priced as claude-opus-4
+    ],
+)
+def test_estimate_cost_by_model_family(model, cost):
+    assert estimate_cost(_call(model)) == cost
+
+
+def test_batches_are_half_price():
+    assert estimate_cost(_call("claude-sonnet-4-5-20250929", batch=True)) == 9.0